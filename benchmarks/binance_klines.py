@@ -0,0 +1,59 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import json
+import random
+from timeit import timeit
+
+from clients.binance import _decode_klines, _kline_columns, _klines_frame, _parse_klines
+from clients.streaming import ColumnBuffer, iter_json_array
+
+
+def _generate_klines(rows: int) -> list[list]:
+    start = 1700000000000
+    step = 60 * 60 * 1000
+    data = []
+    for i in range(rows):
+        price = random.uniform(100, 200)
+        data.append(
+            [
+                start + i * step,
+                f'{price:.8f}',
+                f'{price * 1.01:.8f}',
+                f'{price * 0.99:.8f}',
+                f'{price * 1.005:.8f}',
+                f'{random.uniform(0, 1000):.8f}',
+                start + (i + 1) * step - 1,
+                f'{random.uniform(0, 100000):.8f}',
+                random.randint(0, 10000),
+                f'{random.uniform(0, 500):.8f}',
+                f'{random.uniform(0, 50000):.8f}',
+                '0',
+            ]
+        )
+    return data
+
+
+def _stream_klines(body: bytes):
+    # The opt-in path for long ranges: the body is split while it arrives and appended into column batches
+    columns = ColumnBuffer(_kline_columns)
+    for row in iter_json_array(body[i : i + 65536] for i in range(0, len(body), 65536)):
+        columns.append(row)
+    return _klines_frame(columns.to_arrays())
+
+
+if __name__ == '__main__':
+    number = 20
+    for rows in (500, 1000, 5000):
+        data = _generate_klines(rows)
+        body = json.dumps(data).encode()
+        # All three start from the raw body, json.loads is part of the buffered paths
+        pydantic_time = timeit(lambda: _parse_klines(json.loads(body)), number=number) / number  # noqa: B023
+        numpy_time = timeit(lambda: _decode_klines(json.loads(body)), number=number) / number  # noqa: B023
+        stream_time = timeit(lambda: _stream_klines(body), number=number) / number  # noqa: B023
+        print(
+            f'{rows:>5} rows: pydantic {pydantic_time * 1000:8.2f} ms | numpy {numpy_time * 1000:8.2f} ms'
+            f' ({pydantic_time / numpy_time:4.1f}x) | streamed {stream_time * 1000:8.2f} ms'
+            f' ({pydantic_time / stream_time:4.1f}x)'
+        )
@@ -0,0 +1,40 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+from timeit import timeit
+
+import numpy as np
+import pandas as pd
+
+from constants import TRUSTED_KLINES
+from graph import validate_klines
+
+
+def _generate_klines(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(rows).cumsum().clip(-90)
+    open_ = close + rng.standard_normal(rows).clip(-5, 5)
+    df = pd.DataFrame(
+        {
+            'open_time': pd.date_range('2000-01-01', periods=rows, freq='min'),
+            'open': open_,
+            'high': np.maximum(open_, close) + 1,
+            'low': np.minimum(open_, close) - 1,
+            'close': close,
+            'volume': rng.uniform(0, 1000, rows),
+        }
+    )
+    df.attrs[TRUSTED_KLINES] = True
+    return df
+
+
+if __name__ == '__main__':
+    number = 10
+    for rows in (10_000, 100_000, 1_000_000):
+        df = _generate_klines(rows)
+        timings = []
+        for validation in ('strict', 'sample', 'trusted'):
+            elapsed = timeit(lambda: validate_klines(df, validation), number=number) / number  # noqa: B023
+            timings.append(f'{validation} {elapsed * 1000:8.2f} ms')
+        print(f'{rows:>9} rows: ' + ' | '.join(timings))
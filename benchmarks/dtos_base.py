@@ -0,0 +1,73 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import re
+from datetime import UTC, datetime
+from decimal import Decimal
+from timeit import timeit
+from typing import Any
+
+from pydantic import BaseModel
+
+from dtos import TopGainer
+from dtos.bybit import Launchpool
+
+pattern = re.compile(r'(?<!^)(?=[A-Z])')
+
+
+class RegexBase(BaseModel):
+    # The previous Base: keys converted by regex in __init__, fix-ups after validation
+    def __init__(self, **data: dict[str, Any]) -> None:
+        new_data = {}
+        for key, value in data.items():
+            new_key = pattern.sub('_', key).lower()
+            new_data[new_key] = value
+        super().__init__(**new_data)
+
+        for k, v in self.__dict__.items():
+            if isinstance(v, datetime):
+                setattr(self, k, v.replace(tzinfo=UTC))
+            if isinstance(v, Decimal):
+                setattr(self, k, v.normalize())
+
+
+class RegexTopGainer(RegexBase):
+    symbol: str
+    change: float
+
+
+class RegexLaunchpool(RegexBase):
+    return_coin: str
+    desc: str
+    total_pool_amount: float
+    stake_begin_time: datetime
+    stake_end_time: datetime
+
+
+def launchpool_row(i: int) -> dict:
+    return {
+        'returnCoin': f'COIN{i}',
+        'desc': 'Stake to earn',
+        'totalPoolAmount': '1000000',
+        'stakeBeginTime': 1_700_000_000_000 + i,
+        'stakeEndTime': 1_700_100_000_000 + i,
+        'stakePoolList': [],
+    }
+
+
+if __name__ == '__main__':
+    rows = 10_000
+    tops = [{'symbol': f'COIN{i}', 'change': i / 100} for i in range(rows)]
+    launchpools = [launchpool_row(i) for i in range(rows)]
+
+    for name, old, new, data in [
+        ('top list', RegexTopGainer, TopGainer, tops),
+        ('launchpool', RegexLaunchpool, Launchpool, launchpools),
+    ]:
+        elapsed_old = timeit(lambda: [old(**d) for d in data], number=5) / 5  # noqa: B023
+        elapsed_new = timeit(lambda: [new(**d) for d in data], number=5) / 5  # noqa: B023
+        print(
+            f'{name:10} {rows} rows: regex {elapsed_old * 1000:7.1f} ms, '
+            f'alias {elapsed_new * 1000:7.1f} ms ({elapsed_old / elapsed_new:.1f}x)'
+        )
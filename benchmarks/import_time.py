@@ -0,0 +1,72 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import ast
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+
+modules = [
+    'clients',
+    'clients.binance',
+    'clients.coinmarketcap',
+    'clients.yahoo',
+    'dtos',
+    'utils',
+]
+
+scripts = [
+    'plot_interest_rate',
+    'suggest_vn30',
+    'update_crypto_rsi',
+    'update_fgi',
+    'update_gold',
+    'update_launchpool',
+    'update_p2p',
+    'update_tops',
+    'update_vn30',
+]
+
+
+def _import_time(code: str) -> float:
+    # Sum of the cumulative microseconds of the top-level imports reported by -X importtime
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True,
+        text=True,
+        env=os.environ,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.removeprefix('import time:').split('|')
+        # Nested imports are indented below the import that triggered them
+        if cumulative.strip().isdigit() and not name.startswith('  '):
+            total += int(cumulative)
+    return total / 1000
+
+
+def module_import_time(module: str) -> float:
+    return _import_time(f'import {module}')
+
+
+def script_import_time(script: str) -> float:
+    # Only the script's top-level import statements are run, some scripts do their work at module level
+    tree = ast.parse((src_dir / f'{script}.py').read_text())
+    imports = [node for node in tree.body if isinstance(node, ast.Import | ast.ImportFrom)]
+    return _import_time('\n'.join(ast.unparse(node) for node in imports))
+
+
+if __name__ == '__main__':
+    for name, measure in [*((m, module_import_time) for m in modules), *((s, script_import_time) for s in scripts)]:
+        try:
+            print(f'{name:24} {measure(name):8.1f} ms')
+        except RuntimeError as e:
+            print(f'{name:24} failed: {e}')
@@ -0,0 +1,74 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import json
+from datetime import datetime
+from timeit import timeit
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
+
+from clients.ohlc import payload_to_klines
+
+
+class OhlcData(BaseModel):
+    # Model used by the clients before the shared normalization stage
+    symbol: str
+    time: list[datetime] = Field(alias='t')
+    open: list[float] = Field(alias='o')
+    high: list[float] = Field(alias='h')
+    low: list[float] = Field(alias='l')
+    close: list[float] = Field(alias='c')
+    volume: list[int] = Field(alias='v')
+
+
+def _legacy(payload: dict) -> pd.DataFrame:
+    ohlc = OhlcData.model_validate(payload)
+    df = pd.DataFrame(
+        {
+            'open_time': ohlc.time,
+            'open': ohlc.open,
+            'high': ohlc.high,
+            'low': ohlc.low,
+            'close': ohlc.close,
+            'volume': ohlc.volume,
+        }
+    )
+    df['open_time'] = pd.to_datetime(df['open_time']).dt.tz_localize(None)
+    df['volume'] = df['volume'].astype('float64')
+    return df
+
+
+def _generate_payload(symbols: int, rows: int = 130) -> list[dict]:
+    rng = np.random.default_rng(0)
+    start = 1700000000
+    data = []
+    for i in range(symbols):
+        close = (10000 + rng.standard_normal(rows).cumsum() * 100).round(-1)
+        data.append(
+            {
+                'symbol': f'S{i:03d}',
+                't': [start + d * 86400 for d in range(rows)],
+                'o': close.tolist(),
+                'h': (close + 100).tolist(),
+                'l': (close - 100).tolist(),
+                'c': close.tolist(),
+                'v': rng.integers(0, 10_000_000, rows).tolist(),
+            }
+        )
+    # Round trip through JSON so both paths start from freshly decoded data
+    return json.loads(json.dumps(data))
+
+
+if __name__ == '__main__':
+    number = 10
+    for symbols in (30, 300):
+        payload = _generate_payload(symbols)
+        legacy = timeit(lambda: [_legacy(d) for d in payload], number=number) / number  # noqa: B023
+        shared = timeit(lambda: [payload_to_klines(d) for d in payload], number=number) / number  # noqa: B023
+        print(
+            f'{symbols:>3} symbols: per-client {legacy * 1000:8.2f} ms | shared {shared * 1000:8.2f} ms'
+            f' | {legacy / shared:5.1f}x'
+        )
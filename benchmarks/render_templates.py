@@ -0,0 +1,45 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from timeit import timeit
+
+from templates import _create_environment, compile_templates
+
+context = {
+    'title': 'Top gainers',
+    'time': datetime.now(),
+    'symbols': ['BTC', 'ETH', 'SOL', 'XRP', 'DOGE'],
+    'table': '+--------+--------+',
+}
+
+
+def cold(**kwargs) -> None:
+    # A new environment per render, like a fresh process
+    _create_environment(**kwargs).get_template('top.j2').render(context)
+
+
+if __name__ == '__main__':
+    number = 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp) / 'bytecode'
+        compiled_dir = Path(tmp) / 'compiled'
+        cache_dir.mkdir()
+        compile_templates(compiled_dir)
+        cold(cache_dir=cache_dir)
+
+        elapsed = timeit(cold, number=number) / number
+        print(f'cold, from source:      {elapsed * 1_000_000:8.1f} us')
+        elapsed = timeit(lambda: cold(cache_dir=cache_dir), number=number) / number
+        print(f'cold, bytecode cache:   {elapsed * 1_000_000:8.1f} us')
+        elapsed = timeit(lambda: cold(compiled_dir=compiled_dir), number=number) / number
+        print(f'cold, precompiled:      {elapsed * 1_000_000:8.1f} us')
+
+        env = _create_environment()
+        env.get_template('top.j2')
+        elapsed = timeit(lambda: env.get_template('top.j2').render(context), number=number * 10) / (number * 10)
+        print(f'warm, shared env:       {elapsed * 1_000_000:8.1f} us')
@@ -0,0 +1,93 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import json
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from clients.binance import _decode_klines, _kline_columns, _klines_frame
+from clients.streaming import ColumnBuffer, iter_json_array
+from clients.vci import _parse_stocks
+
+chunk_size = 64 * 1024
+
+
+def _gap_chart(symbols: int, days: int) -> bytes:
+    # Same shape as the VCI gap-chart response: one object of parallel arrays per symbol
+    data = []
+    for i in range(symbols):
+        prices = [round(random.uniform(10, 100), 2) for _ in range(days)]
+        data.append(
+            {
+                'symbol': f'S{i:03}',
+                't': [1700000000 + d * 86400 for d in range(days)],
+                'o': prices,
+                'h': [p * 1.02 for p in prices],
+                'l': [p * 0.98 for p in prices],
+                'c': prices,
+                'v': [random.randint(0, 10**7) for _ in range(days)],
+            }
+        )
+    return json.dumps(data).encode()
+
+
+def _klines(rows: int) -> bytes:
+    step = 60 * 60 * 1000
+    data = []
+    for i in range(rows):
+        price = f'{i:.8f}'
+        data.append([i * step, price, price, price, price, '1.0', (i + 1) * step - 1, '2.0', i, '3.0', '4.0', '0'])
+    return json.dumps(data).encode()
+
+
+def _chunks(body: bytes):
+    for i in range(0, len(body), chunk_size):
+        yield body[i : i + chunk_size]
+
+
+def _stream_klines(body: bytes):
+    columns = ColumnBuffer(_kline_columns)
+    for row in iter_json_array(_chunks(body)):
+        columns.append(row)
+    return _klines_frame(columns.to_arrays())
+
+
+def _measure(func: Callable[[], object]) -> tuple[float, float]:
+    # The body itself is allocated before tracing starts, the peak is what decoding adds on top of it
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == '__main__':
+    gap_chart = _gap_chart(400, 250)
+    klines = _klines(50_000)
+    cases = [
+        (
+            'gap-chart 400 symbols x 250 days',
+            gap_chart,
+            lambda: _parse_stocks(json.loads(gap_chart)),
+            lambda: _parse_stocks(iter_json_array(_chunks(gap_chart))),
+        ),
+        (
+            'klines 50000 rows',
+            klines,
+            lambda: _decode_klines(json.loads(klines)),
+            lambda: _stream_klines(klines),
+        ),
+    ]
+    for name, body, buffered, streamed in cases:
+        buffered_time, buffered_peak = _measure(buffered)
+        streamed_time, streamed_peak = _measure(streamed)
+        print(
+            f'{name} ({len(body) / 2**20:.1f} MiB): '
+            f'buffered {buffered_time * 1000:7.1f} ms peak {buffered_peak / 2**20:6.1f} MiB | '
+            f'streamed {streamed_time * 1000:7.1f} ms peak {streamed_peak / 2**20:6.1f} MiB'
+        )
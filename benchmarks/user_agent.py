@@ -0,0 +1,30 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import tempfile
+from pathlib import Path
+from timeit import timeit
+
+import ua_generator
+
+from clients.user_agent import UserAgentPool
+
+if __name__ == '__main__':
+    number = 10_000
+
+    elapsed = timeit(lambda: ua_generator.generate().text, number=number) / number
+    print(f'ua_generator per request: {elapsed * 1_000_000:8.2f} us')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = Path(tmp) / 'user_agents.json'
+
+        elapsed = timeit(lambda: UserAgentPool(cache_file=cache_file).next(), number=1)
+        print(f'pool cold start:          {elapsed * 1000:8.2f} ms')
+        elapsed = timeit(lambda: UserAgentPool(cache_file=cache_file).next(), number=1)
+        print(f'pool start from disk:     {elapsed * 1000:8.2f} ms')
+
+        pool = UserAgentPool(cache_file=cache_file)
+        pool.next()
+        elapsed = timeit(pool.next, number=number) / number
+        print(f'pool per request:         {elapsed * 1_000_000:8.2f} us')
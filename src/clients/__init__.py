@@ -3,6 +3,11 @@ __github__ = 'https://github.com/khiemdoan'
 __email__ = 'doankhiem.crazy@gmail.com'
 
 __all__ = [
+    'AsyncBinanceClient',
+    'AsyncBybitClient',
+    'AsyncCoinMarketCapClient',
+    'AsyncDnseClient',
+    'AsyncVciClient',
     'BinanceClient',
     'BybitClient',
     'CoinMarketCapClient',
@@ -11,9 +16,40 @@ __all__ = [
     'VciClient',
 ]
 
-from .binance import BinanceClient
-from .bybit import BybitClient
-from .coinmarketcap import CoinMarketCapClient
-from .dnse import DnseClient
-from .vci import VciClient
-from .yahoo import YahooClient
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .binance import AsyncBinanceClient, BinanceClient
+    from .bybit import AsyncBybitClient, BybitClient
+    from .coinmarketcap import AsyncCoinMarketCapClient, CoinMarketCapClient
+    from .dnse import AsyncDnseClient, DnseClient
+    from .vci import AsyncVciClient, VciClient
+    from .yahoo import YahooClient
+
+# Clients are imported on first access, so a script only pays for the clients it uses
+_modules = {
+    'AsyncBinanceClient': '.binance',
+    'AsyncBybitClient': '.bybit',
+    'AsyncCoinMarketCapClient': '.coinmarketcap',
+    'AsyncDnseClient': '.dnse',
+    'AsyncVciClient': '.vci',
+    'BinanceClient': '.binance',
+    'BybitClient': '.bybit',
+    'CoinMarketCapClient': '.coinmarketcap',
+    'DnseClient': '.dnse',
+    'YahooClient': '.yahoo',
+    'VciClient': '.vci',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _modules:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(_modules[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -2,29 +2,87 @@ __author__ = 'Khiem Doan'
 __github__ = 'https://github.com/khiemdoan'
 __email__ = 'doankhiem.crazy@gmail.com'
 
-from contextlib import AbstractContextManager
+import atexit
+import threading
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
 from typing import Self
 
-from niquests import Session
-import ua_generator
+from niquests import AsyncSession, Response, Session
+
+from . import rate_limit
+from .resolver import get_async_resolver, get_resolver
+from .response_cache import ResponseCache, get_response_cache
+from .user_agent import user_agents
+
+_sessions: dict[str, Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _random_user_agent(req, *args, **kwargs) -> None:
+    req.headers['User-Agent'] = user_agents.next()
+
+
+def get_session(base_url: str, *, observe: bool = True) -> Session:
+    # One pooled session per host for the whole process, so connections are kept alive between clients.
+    # observe=False leaves Retry-After handling to the caller instead of pausing the host.
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = Session(
+                base_url=base_url,
+                resolver=get_resolver(),
+                hooks={
+                    'pre_request': [_random_user_agent, rate_limit.before_request],
+                    'response': [rate_limit.after_response] if observe else [],
+                },
+            )
+            _sessions[base_url] = session
+        return session
+
+
+@atexit.register
+def close_sessions() -> None:
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
 
 
 class BaseClient(AbstractContextManager):
     base_url: str
+    # Falls back to the process-wide cache when not set
+    response_cache: ResponseCache | None = None
 
     def __enter__(self) -> Self:
-        self._client = Session(
+        self._client = get_session(self.base_url)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # The session stays open for the next client of the same host, it is closed at exit
+        return
+
+    def _request(self, method: str, url: str, *, ttl: float = 0, **kwargs) -> Response:
+        # Responses of slowly changing endpoints are reused for `ttl` seconds, then revalidated
+        if ttl <= 0:
+            return self._client.request(method, url, **kwargs)
+        cache = self.response_cache or get_response_cache()
+        return cache.fetch(self._client.request, method, url, ttl, base_url=self.base_url, **kwargs)
+
+
+class AsyncBaseClient(AbstractAsyncContextManager):
+    base_url: str
+
+    async def __aenter__(self) -> Self:
+        # An async session is bound to its event loop, so each client opens its own
+        self._client = AsyncSession(
             base_url=self.base_url,
-            resolver=['doh+google://', 'doh+cloudflare://'],
+            resolver=get_async_resolver(),
             hooks={
-                'pre_request': [self._random_user_agent],
+                'pre_request': [_random_user_agent, rate_limit.before_request_async],
+                'response': [rate_limit.after_response],
             },
         )
         return self
 
-    def __exit__(self, exc_type, exc_value, traceback) -> None:
-        self._client.close()
-
-    def _random_user_agent(self, req, *args, **kwargs) -> None:
-        ua = ua_generator.generate()
-        req.headers['User-Agent'] = ua.text
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self._client.close()
@@ -2,14 +2,21 @@ __author__ = 'Khiem Doan'
 __github__ = 'https://github.com/khiemdoan'
 __email__ = 'doankhiem.crazy@gmail.com'
 
-from contextlib import AbstractContextManager
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
+from datetime import datetime
+from pathlib import Path
 from typing import Self
 
-from httpx import Client
+import numpy as np
+import pandas as pd
+from httpx import AsyncClient, Client
 from pydantic import BaseModel, RootModel
 
 from constants import Interval
 
+from . import rate_limit
+from .streaming import ColumnBuffer, aiter_json_array, iter_json_array
+
 
 class Kline(BaseModel):
     open_time: int
@@ -30,34 +37,237 @@ class Klines(RootModel):
     root: list[Kline]
 
 
+def _parse_klines(data: list[list]) -> Klines:
+    klines = [
+        Kline(
+            open_time=k[0],
+            open=float(k[1]),
+            high=float(k[2]),
+            low=float(k[3]),
+            close=float(k[4]),
+            volume=float(k[5]),
+            close_time=k[6],
+            quote_asset_volume=float(k[7]),
+            number_of_trades=k[8],
+            taker_buy_base_asset_volume=float(k[9]),
+            taker_buy_quote_asset_volume=float(k[10]),
+            ignore=float(k[11]),
+        )
+        for k in data
+    ]
+    return Klines(root=klines)
+
+
+_kline_columns = {name: field.annotation for name, field in Kline.model_fields.items()}
+
+
+def _klines_frame(columns: dict[str, np.ndarray]) -> pd.DataFrame:
+    df = pd.DataFrame(columns, copy=False)
+    df['open_time'] = df['open_time'].astype('datetime64[ms]')
+    df['close_time'] = df['close_time'].astype('datetime64[ms]')
+    return df
+
+
+def _decode_klines(data: list[list]) -> pd.DataFrame:
+    # Decode column by column straight into typed arrays, without a model per row
+    values = list(zip(*data, strict=True)) or [()] * len(_kline_columns)
+    return _klines_frame(
+        {
+            name: np.array(column, dtype=np.int64 if kind is int else np.float64)
+            for (name, kind), column in zip(_kline_columns.items(), values, strict=True)
+        }
+    )
+
+
+_max_limit = 1000
+
+
+def _klines_params(
+    symbol: str,
+    interval: Interval,
+    limit: int,
+    start_time: int | None = None,
+    end_time: int | None = None,
+) -> dict:
+    params = {'symbol': symbol, 'interval': interval.value, 'limit': limit}
+    if start_time is not None:
+        params['startTime'] = start_time
+    if end_time is not None:
+        params['endTime'] = end_time
+    return params
+
+
+def _backfill_start(cached: pd.DataFrame | None, start_time: datetime) -> int:
+    if cached is not None and not cached.empty:
+        return int(cached['close_time'].iloc[-1].timestamp() * 1000) + 1
+    return int(start_time.timestamp() * 1000)
+
+
+def _save_backfill(cached: pd.DataFrame | None, klines: pd.DataFrame, now: datetime, cache_file: Path) -> pd.DataFrame:
+    # Only closed candles are stored, so the last close_time is final
+    klines = klines[klines['close_time'] < pd.Timestamp(now.timestamp(), unit='s')]
+
+    if cached is not None:
+        klines = pd.concat([cached, klines], ignore_index=True)
+        klines = klines.drop_duplicates('open_time', keep='last').sort_values('open_time', ignore_index=True)
+
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    klines.to_parquet(cache_file, index=False)
+    return klines
+
+
 class BinanceClient(AbstractContextManager):
     def __enter__(self) -> Self:
-        self._client = Client(base_url='https://api.binance.com', http2=True)
+        self._client = Client(base_url='https://api.binance.com', http2=True, event_hooks=rate_limit.httpx_hooks)
         return self
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
         self._client.close()
 
+    def _fetch_klines(
+        self,
+        symbol: str,
+        interval: Interval,
+        limit: int,
+        start_time: int | None = None,
+        end_time: int | None = None,
+    ) -> list[list]:
+        params = _klines_params(symbol, interval, limit, start_time, end_time)
+        resp = self._client.get('/api/v3/klines', params=params)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _stream_klines(
+        self,
+        columns: ColumnBuffer,
+        symbol: str,
+        interval: Interval,
+        limit: int,
+        start_time: int | None = None,
+        end_time: int | None = None,
+    ) -> int:
+        # Rows go from the response stream into `columns` one by one, the page is never parsed as a whole
+        params = _klines_params(symbol, interval, limit, start_time, end_time)
+        count = len(columns)
+        with self._client.stream('GET', '/api/v3/klines', params=params) as resp:
+            resp.raise_for_status()
+            for row in iter_json_array(resp.iter_bytes()):
+                columns.append(row)
+        return len(columns) - count
+
     def get_klines(self, symbol: str, interval: Interval, limit: int = 500) -> Klines:
-        resp = self._client.get('/api/v3/klines', params={'symbol': symbol, 'interval': interval.value, 'limit': limit})
+        return _parse_klines(self._fetch_klines(symbol, interval, limit))
+
+    def get_klines_df(self, symbol: str, interval: Interval, limit: int = 500) -> pd.DataFrame:
+        return _decode_klines(self._fetch_klines(symbol, interval, limit))
+
+    def get_klines_range(
+        self, symbol: str, interval: Interval, start_time: int, end_time: int, stream: bool = False
+    ) -> pd.DataFrame:
+        # startTime/endTime are in milliseconds, pages are requested until a short page comes back.
+        # stream=True appends each page into typed columns as it arrives, for ranges too long to hold as rows
+        if stream:
+            columns = ColumnBuffer(_kline_columns)
+            while start_time < end_time:
+                if self._stream_klines(columns, symbol, interval, _max_limit, start_time, end_time) < _max_limit:
+                    break
+                start_time = int(columns.last('close_time')) + 1
+            return _klines_frame(columns.to_arrays())
+
+        rows = []
+        while start_time < end_time:
+            page = self._fetch_klines(symbol, interval, _max_limit, start_time, end_time)
+            rows.extend(page)
+            if len(page) < _max_limit:
+                break
+            start_time = page[-1][6] + 1
+        return _decode_klines(rows)
+
+    def backfill_klines(
+        self, symbol: str, interval: Interval, start_time: datetime, cache_dir: Path, stream: bool = False
+    ) -> pd.DataFrame:
+        cache_file = cache_dir / f'{symbol}_{interval.value}.parquet'
+        cached = pd.read_parquet(cache_file) if cache_file.exists() else None
+        now = datetime.now()
+
+        start = _backfill_start(cached, start_time)
+        klines = self.get_klines_range(symbol, interval, start, int(now.timestamp() * 1000), stream)
+        return _save_backfill(cached, klines, now, cache_file)
+
+
+class AsyncBinanceClient(AbstractAsyncContextManager):
+    async def __aenter__(self) -> Self:
+        self._client = AsyncClient(
+            base_url='https://api.binance.com', http2=True, event_hooks=rate_limit.async_httpx_hooks
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self._client.aclose()
+
+    async def _fetch_klines(
+        self,
+        symbol: str,
+        interval: Interval,
+        limit: int,
+        start_time: int | None = None,
+        end_time: int | None = None,
+    ) -> list[list]:
+        params = _klines_params(symbol, interval, limit, start_time, end_time)
+        resp = await self._client.get('/api/v3/klines', params=params)
         resp.raise_for_status()
+        return resp.json()
+
+    async def _stream_klines(
+        self,
+        columns: ColumnBuffer,
+        symbol: str,
+        interval: Interval,
+        limit: int,
+        start_time: int | None = None,
+        end_time: int | None = None,
+    ) -> int:
+        params = _klines_params(symbol, interval, limit, start_time, end_time)
+        count = len(columns)
+        async with self._client.stream('GET', '/api/v3/klines', params=params) as resp:
+            resp.raise_for_status()
+            async for row in aiter_json_array(resp.aiter_bytes()):
+                columns.append(row)
+        return len(columns) - count
+
+    async def get_klines(self, symbol: str, interval: Interval, limit: int = 500) -> Klines:
+        return _parse_klines(await self._fetch_klines(symbol, interval, limit))
+
+    async def get_klines_df(self, symbol: str, interval: Interval, limit: int = 500) -> pd.DataFrame:
+        return _decode_klines(await self._fetch_klines(symbol, interval, limit))
+
+    async def get_klines_range(
+        self, symbol: str, interval: Interval, start_time: int, end_time: int, stream: bool = False
+    ) -> pd.DataFrame:
+        if stream:
+            columns = ColumnBuffer(_kline_columns)
+            while start_time < end_time:
+                if await self._stream_klines(columns, symbol, interval, _max_limit, start_time, end_time) < _max_limit:
+                    break
+                start_time = int(columns.last('close_time')) + 1
+            return _klines_frame(columns.to_arrays())
+
+        rows = []
+        while start_time < end_time:
+            page = await self._fetch_klines(symbol, interval, _max_limit, start_time, end_time)
+            rows.extend(page)
+            if len(page) < _max_limit:
+                break
+            start_time = page[-1][6] + 1
+        return _decode_klines(rows)
+
+    async def backfill_klines(
+        self, symbol: str, interval: Interval, start_time: datetime, cache_dir: Path, stream: bool = False
+    ) -> pd.DataFrame:
+        cache_file = cache_dir / f'{symbol}_{interval.value}.parquet'
+        cached = pd.read_parquet(cache_file) if cache_file.exists() else None
+        now = datetime.now()
 
-        klines = [
-            Kline(
-                open_time=k[0],
-                open=float(k[1]),
-                high=float(k[2]),
-                low=float(k[3]),
-                close=float(k[4]),
-                volume=float(k[5]),
-                close_time=k[6],
-                quote_asset_volume=float(k[7]),
-                number_of_trades=k[8],
-                taker_buy_base_asset_volume=float(k[9]),
-                taker_buy_quote_asset_volume=float(k[10]),
-                ignore=float(k[11]),
-            )
-            for k in resp.json()
-        ]
-
-        return Klines(root=klines)
+        start = _backfill_start(cached, start_time)
+        klines = await self.get_klines_range(symbol, interval, start, int(now.timestamp() * 1000), stream)
+        return _save_backfill(cached, klines, now, cache_file)
@@ -2,21 +2,23 @@ __author__ = 'Khiem Doan'
 __github__ = 'https://github.com/khiemdoan'
 __email__ = 'doankhiem.crazy@gmail.com'
 
-from typing import Self
-
-from httpx import Client
-
 from dtos.bybit import Launchpool
 
+from .base import AsyncBaseClient, BaseClient
 
-class BybitClient:
-    def __enter__(self) -> Self:
-        self._client = Client(base_url='https://api.bybit.com/', http2=True)
-        return self
 
-    def __exit__(self, exc_type, exc_value, traceback) -> None:
-        self._client.close()
+class BybitClient(BaseClient):
+    base_url = 'https://api.bybit.com'
 
     def get_launchpools(self) -> list[Launchpool]:
-        resp = self._client.get('spot/api/launchpool/v1/home')
+        # Launchpools change a few times a day
+        resp = self._request('GET', '/spot/api/launchpool/v1/home', ttl=3600)
+        return [Launchpool(**d) for d in resp.json()['result']['list']]
+
+
+class AsyncBybitClient(AsyncBaseClient):
+    base_url = 'https://api.bybit.com'
+
+    async def get_launchpools(self) -> list[Launchpool]:
+        resp = await self._client.get('/spot/api/launchpool/v1/home')
         return [Launchpool(**d) for d in resp.json()['result']['list']]
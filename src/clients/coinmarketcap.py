@@ -3,11 +3,13 @@ __github__ = 'https://github.com/khiemdoan'
 __email__ = 'doankhiem.crazy@gmail.com'
 
 from datetime import datetime
+from typing import Any
 
-from pydantic import BaseModel, Field
+import pandas as pd
+from pydantic import BaseModel, Field, model_validator
 from tenacity import retry, stop_after_attempt, wait_exponential
 
-from .base import BaseClient
+from .base import AsyncBaseClient, BaseClient
 
 
 class Rsi(BaseModel):
@@ -27,6 +29,14 @@ class Rsi(BaseModel):
     rsi24h: float
     rsi7d: float
 
+    @model_validator(mode='before')
+    @classmethod
+    def _flatten_rsi(cls, data: Any) -> Any:
+        # Items come with their RSI values nested under 'rsi'
+        if isinstance(data, dict) and isinstance(data.get('rsi'), dict):
+            data = {**data, **data['rsi']}
+        return data
+
 
 class Status(BaseModel):
     timestamp: datetime
@@ -36,29 +46,8 @@ class Status(BaseModel):
     credit_count: int
 
 
-class RsiValue(BaseModel):
-    rsi15m: float
-    rsi1h: float
-    rsi4h: float
-    rsi24h: float
-    rsi7d: float
-
-
-class RsiItemResponse(BaseModel):
-    id: str
-    symbol: str
-    slug: str
-    name: str
-    marketCap: float
-    volume24h: float
-    price: float
-    price24h: float
-    rank: int
-    rsi: RsiValue
-
-
 class RsiData(BaseModel):
-    data: list[RsiItemResponse]
+    data: list[Rsi]
 
 
 class RsiResponse(BaseModel):
@@ -87,51 +76,77 @@ class RsiOverallResponse(BaseModel):
     data: RsiOverall
 
 
+_overall_params = {
+    'timeframe': '1h',
+    'rsiPeriod': 14,
+    'volume24hRange.min': 1000000,
+    'marketCapRange.min': 50000000,
+}
+
+
+def _table_params(limit: int) -> dict:
+    return {
+        'limit': limit,
+        'rsiPeriod': 14,
+        'volume24hRange.min': 1000000,
+        'marketCapRange.min': 50000000,
+        'sort': 'rank',
+    }
+
+
+def _decode_rsi_df(content: bytes) -> pd.DataFrame:
+    # Validated once into Rsi items, then laid out column by column
+    items = RsiResponse.model_validate_json(content).data.data
+    return pd.DataFrame({name: [getattr(item, name) for item in items] for name in Rsi.model_fields})
+
+
 class CoinMarketCapClient(BaseClient):
     base_url = 'https://api.coinmarketcap.com'
 
     @retry(reraise=True, stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10))
     def fetch_overral_rsi(self) -> RsiOverralDetail:
-        params = {
-            'timeframe': '1h',
-            'rsiPeriod': 14,
-            'volume24hRange.min': 1000000,
-            'marketCapRange.min': 50000000,
-        }
-        resp = self._client.get('data-api/v3/cryptocurrency/rsi/heatmap/overall', params=params)
+        resp = self._client.get('data-api/v3/cryptocurrency/rsi/heatmap/overall', params=_overall_params)
         resp.raise_for_status()
 
         resp = RsiOverallResponse.model_validate_json(resp.content)
         return resp.data.overall
 
+    def _fetch_rsi_table(self, limit: int) -> bytes:
+        resp = self._client.get('/data-api/v3/cryptocurrency/rsi/heatmap/table', params=_table_params(limit))
+        resp.raise_for_status()
+        return resp.content
+
+    @retry(reraise=True, stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10))
+    def fetch_rsi(self, limit: int = 10) -> list[Rsi]:
+        resp = RsiResponse.model_validate_json(self._fetch_rsi_table(limit))
+        return resp.data.data
+
+    @retry(reraise=True, stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10))
+    def fetch_rsi_df(self, limit: int = 10) -> pd.DataFrame:
+        return _decode_rsi_df(self._fetch_rsi_table(limit))
+
+
+class AsyncCoinMarketCapClient(AsyncBaseClient):
+    base_url = 'https://api.coinmarketcap.com'
+
     @retry(reraise=True, stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10))
-    def fetch_rsi(self) -> list[Rsi]:
-        params = {
-            'limit': 10,
-            'rsiPeriod': 14,
-            'volume24hRange.min': 1000000,
-            'marketCapRange.min': 50000000,
-            'sort': 'rank',
-        }
-        resp = self._client.get('/data-api/v3/cryptocurrency/rsi/heatmap/table', params=params)
+    async def fetch_overral_rsi(self) -> RsiOverralDetail:
+        resp = await self._client.get('data-api/v3/cryptocurrency/rsi/heatmap/overall', params=_overall_params)
+        resp.raise_for_status()
+
+        resp = RsiOverallResponse.model_validate_json(resp.content)
+        return resp.data.overall
+
+    async def _fetch_rsi_table(self, limit: int) -> bytes:
+        resp = await self._client.get('/data-api/v3/cryptocurrency/rsi/heatmap/table', params=_table_params(limit))
         resp.raise_for_status()
+        return resp.content
 
-        resp = RsiResponse.model_validate_json(resp.content)
-        return [
-            Rsi(
-                rank=item.rank,
-                symbol=item.symbol,
-                name=item.name,
-                slug=item.slug,
-                marketCap=item.marketCap,
-                volume24h=item.volume24h,
-                price=item.price,
-                price24h=item.price24h,
-                rsi15m=item.rsi.rsi15m,
-                rsi1h=item.rsi.rsi1h,
-                rsi4h=item.rsi.rsi4h,
-                rsi24h=item.rsi.rsi24h,
-                rsi7d=item.rsi.rsi7d,
-            )
-            for item in resp.data.data
-        ]
+    @retry(reraise=True, stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10))
+    async def fetch_rsi(self, limit: int = 10) -> list[Rsi]:
+        resp = RsiResponse.model_validate_json(await self._fetch_rsi_table(limit))
+        return resp.data.data
+
+    @retry(reraise=True, stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10))
+    async def fetch_rsi_df(self, limit: int = 10) -> pd.DataFrame:
+        return _decode_rsi_df(await self._fetch_rsi_table(limit))
@@ -0,0 +1,58 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+from constants import TRUSTED_KLINES
+
+_value_columns = ['open', 'high', 'low', 'close', 'volume']
+
+
+def has_valid_values(klines: pd.DataFrame) -> bool:
+    # Vectorised form of the klines schema checks: typed columns, no missing time, no negative or NaN value
+    values = klines[_value_columns]
+    return (
+        klines['open_time'].dtype.kind == 'M'
+        and bool(klines['open_time'].notna().all())
+        and all(dtype == np.float64 for dtype in values.dtypes)
+        and bool((values.to_numpy() >= 0).all())
+    )
+
+
+def to_klines(
+    time: Sequence | np.ndarray,
+    open: Sequence | np.ndarray,
+    high: Sequence | np.ndarray,
+    low: Sequence | np.ndarray,
+    close: Sequence | np.ndarray,
+    volume: Sequence | np.ndarray,
+    unit: str = 's',
+) -> pd.DataFrame:
+    # Epoch numbers become naive UTC datetime64 directly, every column is converted once and not copied again
+    time = np.asarray(time)
+    if time.dtype.kind != 'M':
+        time = time.astype(np.int64).astype(f'datetime64[{unit}]')
+
+    df = pd.DataFrame(
+        {
+            'open_time': time,
+            'open': np.asarray(open, dtype=np.float64),
+            'high': np.asarray(high, dtype=np.float64),
+            'low': np.asarray(low, dtype=np.float64),
+            'close': np.asarray(close, dtype=np.float64),
+            'volume': np.asarray(volume, dtype=np.float64),
+        },
+        copy=False,
+    )
+    # Only frames that pass the value checks skip the full schema validation later
+    df.attrs[TRUSTED_KLINES] = has_valid_values(df)
+    return df
+
+
+def payload_to_klines(payload: dict) -> pd.DataFrame:
+    # TradingView style payload: {'t': [...], 'o': [...], 'h': [...], 'l': [...], 'c': [...], 'v': [...]}
+    return to_klines(payload['t'], payload['o'], payload['h'], payload['l'], payload['c'], payload['v'])
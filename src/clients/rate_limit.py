@@ -0,0 +1,169 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import asyncio
+import threading
+import time
+from collections.abc import Callable, Mapping
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from loguru import logger
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class RateLimitSettings(BaseSettings):
+    # Requests per second and burst size, per host
+    rate: float = 5.0
+    burst: int = 10
+    hosts: dict[str, tuple[float, int]] = {
+        'api.binance.com': (20.0, 50),
+        'api.coinmarketcap.com': (2.0, 5),
+        'trading.vietcap.com.vn': (5.0, 10),
+    }
+
+    model_config = SettingsConfigDict(
+        extra='ignore',
+        env_prefix='RATE_LIMIT_',
+        env_file='.env',
+        env_file_encoding='utf-8',
+    )
+
+
+# Header with the weight used in the current window: (weight limit, window in seconds)
+_weight_headers = {
+    'x-mbx-used-weight-1m': (6000, 60),
+}
+# Fraction of the weight limit after which requests wait for the next window
+_weight_threshold = 0.9
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        capacity: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def _reserve(self, tokens: float) -> float:
+        # Tokens are taken right away and may go negative, the caller waits until they are paid back.
+        # Reserving under the lock keeps concurrent callers in order without holding the lock while sleeping.
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self, tokens: float = 1) -> float:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        # Nothing is left to burst with once the pause is over, beyond what refills meanwhile
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0)
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+_buckets: dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(host: str) -> TokenBucket:
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            settings = RateLimitSettings()
+            rate, burst = settings.hosts.get(host, (settings.rate, settings.burst))
+            bucket = TokenBucket(rate, burst)
+            _buckets[host] = bucket
+        return bucket
+
+
+def _retry_after(value: str) -> float | None:
+    # Either a number of seconds or an HTTP date
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except TypeError, ValueError:
+        return None
+
+
+def _host(url: str) -> str:
+    return urlsplit(str(url)).hostname or ''
+
+
+def observe(url: str, status_code: int, headers: Mapping[str, str]) -> None:
+    host = _host(url)
+    bucket = get_bucket(host)
+
+    retry_after = headers.get('retry-after')
+    if retry_after is not None and status_code in (418, 429, 503):
+        seconds = _retry_after(retry_after)
+        if seconds is not None and seconds > 0:
+            logger.warning(f'{host} asked to retry after {seconds:.1f}s')
+            bucket.pause(seconds)
+
+    for header, (limit, window) in _weight_headers.items():
+        used = headers.get(header)
+        if used is not None and int(used) >= limit * _weight_threshold:
+            # The weight is counted per wall clock window, wait for the next one
+            seconds = window - time.time() % window
+            logger.warning(f'{host} used weight {used}/{limit}, pausing {seconds:.1f}s')
+            bucket.pause(seconds)
+
+
+# Hooks for niquests sessions
+def before_request(req, *args, **kwargs) -> None:
+    get_bucket(_host(req.url)).acquire()
+
+
+async def before_request_async(req, *args, **kwargs) -> None:
+    await get_bucket(_host(req.url)).acquire_async()
+
+
+def after_response(resp, *args, **kwargs) -> None:
+    observe(resp.url, resp.status_code, resp.headers)
+
+
+# Event hooks for httpx clients
+def _httpx_request(request) -> None:
+    get_bucket(request.url.host).acquire()
+
+
+async def _httpx_request_async(request) -> None:
+    await get_bucket(request.url.host).acquire_async()
+
+
+def _httpx_response(response) -> None:
+    observe(response.url, response.status_code, response.headers)
+
+
+async def _httpx_response_async(response) -> None:
+    observe(response.url, response.status_code, response.headers)
+
+
+httpx_hooks = {'request': [_httpx_request], 'response': [_httpx_response]}
+async_httpx_hooks = {'request': [_httpx_request_async], 'response': [_httpx_response_async]}
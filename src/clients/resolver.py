@@ -0,0 +1,220 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import atexit
+import json
+import socket
+import threading
+import time
+from collections.abc import Callable
+from functools import cache
+from pathlib import Path
+
+from niquests.packages.urllib3.contrib.resolver import BaseResolver, ProtocolResolver
+from niquests.packages.urllib3.contrib.resolver._async import AsyncBaseResolver
+from niquests.utils import create_async_resolver, create_resolver
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+AddrInfo = tuple[socket.AddressFamily, socket.SocketKind, int, str | bytes, tuple]
+CacheKey = tuple[str, int, int, int]
+
+
+class ResolverSettings(BaseSettings):
+    servers: list[str] = ['doh+google://', 'doh+cloudflare://']
+    default_ttl: int = 300
+    cache_file: Path | None = None
+
+    model_config = SettingsConfigDict(
+        extra='ignore',
+        env_prefix='DNS_',
+        env_file='.env',
+        env_file_encoding='utf-8',
+    )
+
+
+class DnsCache:
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[CacheKey, tuple[float, list[AddrInfo]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: CacheKey) -> list[AddrInfo] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+    def set(self, key: CacheKey, records: list[AddrInfo], ttl: int) -> None:
+        if ttl <= 0 or not records:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, records)
+
+    def load(self, file: Path) -> None:
+        try:
+            data = json.loads(file.read_text())
+        except FileNotFoundError, ValueError:
+            return
+
+        now = self._clock()
+        with self._lock:
+            for item in data:
+                if item['expires_at'] <= now:
+                    continue
+                records = [
+                    (socket.AddressFamily(f), socket.SocketKind(t), p, c, tuple(a)) for f, t, p, c, a in item['records']
+                ]
+                self._entries[tuple(item['key'])] = (item['expires_at'], records)
+
+    def save(self, file: Path) -> None:
+        now = self._clock()
+        with self._lock:
+            data = [
+                {
+                    'key': list(key),
+                    'expires_at': expires_at,
+                    # canonname may carry binary ECH config, it is not worth persisting
+                    'records': [
+                        [int(f), int(t), p, c if isinstance(c, str) else '', list(a)] for f, t, p, c, a in records
+                    ],
+                }
+                for key, (expires_at, records) in self._entries.items()
+                if expires_at > now
+            ]
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(json.dumps(data))
+
+
+def _cache_key(host: bytes | str | None, family: socket.AddressFamily, type: socket.SocketKind, proto: int) -> CacheKey:
+    if isinstance(host, bytes):
+        host = host.decode('ascii')
+    return (host or '').lower(), int(family), int(type), proto
+
+
+def _store(cache: DnsCache, key: CacheKey, records: list[AddrInfo], default_ttl: int) -> list[AddrInfo]:
+    # DoH answers carry the shortest record TTL, other resolvers fall back to the default
+    ttl = getattr(records, 'ttl', default_ttl)
+    records = list(records)
+    cache.set(key, records, ttl)
+    return records
+
+
+def _with_port(records: list[AddrInfo], port: str | int | None) -> list[AddrInfo]:
+    if port is None:
+        return records
+    port = int(port)
+    return [(f, t, p, c, (a[0], port, *a[2:])) for f, t, p, c, a in records]
+
+
+class CachedResolver(BaseResolver):
+    protocol = ProtocolResolver.CUSTOM
+    implementation = 'cached'
+
+    def __init__(self, upstream: BaseResolver, cache: DnsCache, default_ttl: int = 300) -> None:
+        super().__init__(None, None)
+        self._upstream = upstream
+        self._cache = cache
+        self._default_ttl = default_ttl
+
+    def recycle(self) -> BaseResolver:
+        return CachedResolver(self._upstream.recycle(), self._cache, self._default_ttl)
+
+    def close(self) -> None:
+        self._upstream.close()
+
+    def is_available(self) -> bool:
+        return self._upstream.is_available()
+
+    def getaddrinfo(
+        self,
+        host: bytes | str | None,
+        port: str | int | None,
+        family: socket.AddressFamily,
+        type: socket.SocketKind,
+        proto: int = 0,
+        flags: int = 0,
+        *,
+        quic_upgrade_via_dns_rr: bool = False,
+    ) -> list[AddrInfo]:
+        key = _cache_key(host, family, type, proto)
+        records = self._cache.get(key)
+        if records is None:
+            records = self._upstream.getaddrinfo(
+                host, port, family, type, proto, flags, quic_upgrade_via_dns_rr=quic_upgrade_via_dns_rr
+            )
+            records = _store(self._cache, key, records, self._default_ttl)
+        return _with_port(records, port)
+
+
+class AsyncCachedResolver(AsyncBaseResolver):
+    # Same cache as CachedResolver, in front of an async upstream for AsyncSession
+    protocol = ProtocolResolver.CUSTOM
+    implementation = 'cached'
+
+    def __init__(self, upstream: AsyncBaseResolver, cache: DnsCache, default_ttl: int = 300) -> None:
+        super().__init__(None, None)
+        self._upstream = upstream
+        self._cache = cache
+        self._default_ttl = default_ttl
+
+    def recycle(self) -> AsyncBaseResolver:
+        return AsyncCachedResolver(self._upstream.recycle(), self._cache, self._default_ttl)
+
+    async def close(self) -> None:
+        await self._upstream.close()
+
+    def is_available(self) -> bool:
+        return self._upstream.is_available()
+
+    async def getaddrinfo(
+        self,
+        host: bytes | str | None,
+        port: str | int | None,
+        family: socket.AddressFamily,
+        type: socket.SocketKind,
+        proto: int = 0,
+        flags: int = 0,
+        *,
+        quic_upgrade_via_dns_rr: bool = False,
+    ) -> list[AddrInfo]:
+        key = _cache_key(host, family, type, proto)
+        records = self._cache.get(key)
+        if records is None:
+            records = await self._upstream.getaddrinfo(
+                host, port, family, type, proto, flags, quic_upgrade_via_dns_rr=quic_upgrade_via_dns_rr
+            )
+            records = _store(self._cache, key, records, self._default_ttl)
+        return _with_port(records, port)
+
+
+dns_cache = DnsCache()
+
+
+@cache
+def _get_settings() -> ResolverSettings:
+    # The shared cache is warmed from and saved to DNS_CACHE_FILE when it is set
+    settings = ResolverSettings()
+    if settings.cache_file is not None:
+        dns_cache.load(settings.cache_file)
+        atexit.register(dns_cache.save, settings.cache_file)
+    return settings
+
+
+@cache
+def get_resolver() -> CachedResolver:
+    # Shared by every session of the process
+    settings = _get_settings()
+    return CachedResolver(create_resolver(settings.servers), dns_cache, settings.default_ttl)
+
+
+def get_async_resolver() -> AsyncCachedResolver:
+    # Async upstreams are bound to their event loop, so each AsyncSession gets its own in front of the shared cache
+    settings = _get_settings()
+    return AsyncCachedResolver(create_async_resolver(settings.servers), dns_cache, settings.default_ttl)
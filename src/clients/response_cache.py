@@ -0,0 +1,185 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime
+from functools import cache
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from niquests import PreparedRequest, Response
+from niquests.structures import CaseInsensitiveDict
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class ResponseCacheSettings(BaseSettings):
+    cache_dir: Path | None = None
+    # Expired entries are kept this many seconds for revalidation, then pruned
+    cache_max_stale: float = 86400
+
+    model_config = SettingsConfigDict(
+        extra='ignore',
+        env_prefix='HTTP_',
+        env_file='.env',
+        env_file_encoding='utf-8',
+    )
+
+
+class CachedResponse(NamedTuple):
+    method: str
+    url: str
+    status_code: int
+    headers: dict[str, str]
+    content: bytes
+    expires_at: float
+
+    def to_response(self) -> Response:
+        request = PreparedRequest()
+        request.method = self.method
+        request.url = self.url
+
+        resp = Response()
+        resp.status_code = self.status_code
+        resp.headers = CaseInsensitiveDict(self.headers)
+        resp._content = self.content
+        resp.url = self.url
+        resp.request = request
+        return resp
+
+
+def floor_time(period: int) -> datetime:
+    # Current time rounded down to `period` seconds, so time windows in a request stay the same within a TTL
+    now = time.time()
+    return datetime.fromtimestamp(now - now % period)
+
+
+_conditional_headers = {'if-none-match', 'if-modified-since'}
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: Path | None = None, clock: Callable[[], float] = time.time) -> None:
+        self._cache_dir = cache_dir
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[str, CachedResponse] = {}
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(method: str, url: str, params: Any = None, body: Any = None, headers: Any = None) -> str:
+        # Headers passed with the request (auth, Accept, Referer...) can change the response, so they are part of
+        # the key. Session headers such as the rotating User-Agent are not passed here and do not split entries.
+        headers = {k.lower(): v for k, v in (headers or {}).items() if k.lower() not in _conditional_headers}
+        raw = json.dumps([method.upper(), url, params, body, headers], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self._cache_dir / f'{key}.json', self._cache_dir / f'{key}.body'
+
+    def get(self, key: str) -> CachedResponse | None:
+        # Stale entries are returned as well, they can still be revalidated
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None or self._cache_dir is None:
+            return entry
+
+        meta_file, body_file = self._paths(key)
+        try:
+            meta = json.loads(meta_file.read_text())
+            content = body_file.read_bytes()
+        except FileNotFoundError, ValueError:
+            return None
+        entry = CachedResponse(content=content, **meta)
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def set(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+        if self._cache_dir is None:
+            return
+
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        meta_file, body_file = self._paths(key)
+        meta = entry._asdict()
+        del meta['content']
+        body_file.write_bytes(entry.content)
+        meta_file.write_text(json.dumps(meta))
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return entry.expires_at > self._clock()
+
+    def prune(self, max_stale: float = 0) -> int:
+        # Drops entries that expired more than `max_stale` seconds ago, in memory and on disk
+        deadline = self._clock() - max_stale
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry.expires_at <= deadline]
+            for key in expired:
+                del self._entries[key]
+        removed = set(expired)
+
+        if self._cache_dir is not None and self._cache_dir.exists():
+            for meta_file in self._cache_dir.glob('*.json'):
+                try:
+                    expires_at = json.loads(meta_file.read_text())['expires_at']
+                except FileNotFoundError, KeyError, ValueError:
+                    expires_at = float('-inf')
+                if expires_at <= deadline:
+                    meta_file.unlink(missing_ok=True)
+                    meta_file.with_suffix('.body').unlink(missing_ok=True)
+                    removed.add(meta_file.stem)
+        return len(removed)
+
+    def fetch(
+        self,
+        send: Callable[..., Response],
+        method: str,
+        url: str,
+        ttl: float,
+        base_url: str = '',
+        **kwargs,
+    ) -> Response:
+        # `send` is called as send(method, url, **kwargs) when there is no fresh entry
+        headers = dict(kwargs.pop('headers', None) or {})
+        key = self.key(method, base_url + url, kwargs.get('params'), kwargs.get('json', kwargs.get('data')), headers)
+        entry = self.get(key)
+        if entry is not None and self.is_fresh(entry):
+            self.hits += 1
+            return entry.to_response()
+
+        if entry is not None:
+            if 'etag' in entry.headers:
+                headers['If-None-Match'] = entry.headers['etag']
+            if 'last-modified' in entry.headers:
+                headers['If-Modified-Since'] = entry.headers['last-modified']
+
+        resp = send(method, url, headers=headers, **kwargs)
+
+        if resp.status_code == 304 and entry is not None:
+            self.revalidations += 1
+            self.set(key, entry._replace(expires_at=self._clock() + ttl))
+            return entry.to_response()
+
+        self.misses += 1
+        if resp.ok:
+            headers = {k.lower(): v for k, v in resp.headers.items()}
+            expires_at = self._clock() + ttl
+            self.set(key, CachedResponse(method, str(resp.url), resp.status_code, headers, resp.content, expires_at))
+        return resp
+
+
+@cache
+def get_response_cache() -> ResponseCache:
+    # Kept in memory for the process, and on disk across runs when HTTP_CACHE_DIR is set.
+    # Long expired entries are pruned from disk once per process.
+    settings = ResponseCacheSettings()
+    cache = ResponseCache(settings.cache_dir)
+    cache.prune(settings.cache_max_stale)
+    return cache
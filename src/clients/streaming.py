@@ -0,0 +1,145 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import codecs
+import json
+import re
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator, Mapping, Sequence
+from typing import Any
+
+import numpy as np
+
+_whitespace = re.compile(r'[ \t\n\r]*')
+_number_tail = '.eE+-'
+
+
+class JsonArraySplitter:
+    # Splits a top-level JSON array into its elements while the body arrives,
+    # so only the element being parsed is held as text and as Python objects
+    def __init__(self) -> None:
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._state = 'start'
+        # An incomplete element is parsed again only once the pending text has doubled, keeping the work linear
+        self._retry_at = 0
+
+    def feed(self, data: bytes) -> list:
+        self._buffer += self._decoder.decode(data)
+        return self._drain(final=False)
+
+    def close(self) -> list:
+        self._buffer += self._decoder.decode(b'', final=True)
+        items = self._drain(final=True)
+        if self._state != 'end':
+            raise ValueError('Unexpected end of JSON array')
+        return items
+
+    def _drain(self, final: bool) -> list:
+        items = []
+        buffer = self._buffer
+        pos = 0
+        while True:
+            pos = _whitespace.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+
+            if self._state == 'start':
+                if char != '[':
+                    raise ValueError('Expected a JSON array')
+                self._state = 'first'
+                pos += 1
+            elif self._state in ('first', 'next') and char == ']':
+                self._state = 'end'
+                pos += 1
+            elif self._state == 'next':
+                if char != ',':
+                    raise ValueError(f'Expected , or ] at {char!r}')
+                self._state = 'value'
+                pos += 1
+            elif self._state in ('first', 'value'):
+                if not final and len(buffer) < self._retry_at:
+                    break
+                try:
+                    item, end = self._json.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    self._retry_at = 2 * len(buffer) - pos
+                    break
+                if not final and (end == len(buffer) or buffer[end] in _number_tail):
+                    # A number may go on in the next chunk: "70." or "1e" is decoded as 70 or 1 otherwise
+                    self._retry_at = 0
+                    break
+                items.append(item)
+                self._retry_at = 0
+                self._state = 'next'
+                pos = end
+            else:
+                raise ValueError(f'Unexpected {char!r} after the JSON array')
+
+        self._buffer = buffer[pos:]
+        return items
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    splitter = JsonArraySplitter()
+    for chunk in chunks:
+        yield from splitter.feed(chunk)
+    yield from splitter.close()
+
+
+async def aiter_json_array(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    splitter = JsonArraySplitter()
+    async for chunk in chunks:
+        for item in splitter.feed(chunk):
+            yield item
+    for item in splitter.close():
+        yield item
+
+
+class ColumnBuffer:
+    # Rows are collected in batches and each batch becomes one typed array per column,
+    # so a long stream never holds more than a batch of rows as Python objects
+    def __init__(self, columns: Mapping[str, type], batch_size: int = 1000) -> None:
+        self._names = list(columns)
+        self._dtypes = [np.int64 if kind is int else np.float64 for kind in columns.values()]
+        self._batch_size = batch_size
+        self._rows: list[Sequence] = []
+        self._batches: list[list[np.ndarray]] = []
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length + len(self._rows)
+
+    def append(self, row: Sequence) -> None:
+        if len(row) != len(self._names):
+            raise ValueError(f'Expected {len(self._names)} values, got {len(row)}')
+        self._rows.append(row)
+        if len(self._rows) >= self._batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        # Converted before anything is stored, a bad batch leaves the columns aligned
+        columns = zip(*self._rows, strict=True)
+        batch = [np.array(column, dtype=dtype) for column, dtype in zip(columns, self._dtypes, strict=True)]
+        self._batches.append(batch)
+        self._length += len(self._rows)
+        self._rows = []
+
+    def last(self, name: str) -> int | float:
+        index = self._names.index(name)
+        if self._rows:
+            return self._dtypes[index](self._rows[-1][index]).item()
+        return self._batches[-1][index][-1].item()
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        self._flush()
+        return {
+            name: np.concatenate([batch[i] for batch in self._batches]) if self._batches else np.array([], dtype=dtype)
+            for i, (name, dtype) in enumerate(zip(self._names, self._dtypes, strict=True))
+        }
@@ -0,0 +1,59 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import json
+import threading
+from collections.abc import Iterator
+from itertools import cycle
+from pathlib import Path
+
+import ua_generator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class UserAgentSettings(BaseSettings):
+    pool_size: int = 100
+    cache_file: Path | None = None
+
+    model_config = SettingsConfigDict(
+        extra='ignore',
+        env_prefix='UA_',
+        env_file='.env',
+        env_file_encoding='utf-8',
+    )
+
+
+class UserAgentPool:
+    def __init__(self, size: int = 100, cache_file: Path | None = None) -> None:
+        self._size = size
+        self._cache_file = cache_file
+        self._lock = threading.Lock()
+        self._cycle: Iterator[str] | None = None
+
+    def _load(self) -> list[str]:
+        if self._cache_file is not None:
+            try:
+                agents = json.loads(self._cache_file.read_text())
+                if len(agents) >= self._size:
+                    return agents[: self._size]
+            except FileNotFoundError, ValueError:
+                pass
+
+        agents = [ua_generator.generate().text for _ in range(self._size)]
+        if self._cache_file is not None:
+            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+            self._cache_file.write_text(json.dumps(agents))
+        return agents
+
+    def next(self) -> str:
+        # The pool is built on first use, afterwards each call just advances the cycle
+        if self._cycle is None:
+            with self._lock:
+                if self._cycle is None:
+                    self._cycle = cycle(self._load())
+        return next(self._cycle)
+
+
+_settings = UserAgentSettings()
+user_agents = UserAgentPool(_settings.pool_size, _settings.cache_file)
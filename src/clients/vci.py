@@ -2,23 +2,62 @@ __author__ = 'Khiem Doan'
 __github__ = 'https://github.com/khiemdoan'
 __email__ = 'doankhiem.crazy@gmail.com'
 
-from datetime import datetime, timedelta
+from collections.abc import AsyncIterable, Iterable
+from datetime import timedelta
 
 import pandas as pd
-from pydantic import BaseModel, Field
+from loguru import logger
 from tenacity import retry, stop_after_attempt, wait_exponential
 
-from .base import BaseClient
+from .base import AsyncBaseClient, BaseClient
+from .ohlc import payload_to_klines
+from .response_cache import floor_time
+from .streaming import aiter_json_array, iter_json_array
 
+# Daily candles are refreshed at most every 5 minutes
+_ttl = 300
+_chunk_size = 64 * 1024
 
-class OhlcData(BaseModel):
-    symbol: str
-    time: list[datetime] = Field(alias='t')
-    open: list[float] = Field(alias='o')
-    high: list[float] = Field(alias='h')
-    low: list[float] = Field(alias='l')
-    close: list[float] = Field(alias='c')
-    volume: list[int] = Field(alias='v')
+
+def _vn30_request() -> tuple[dict, dict]:
+    headers = {'Referer': 'https://trading.vietcap.com.vn/price-board'}
+    to_time = floor_time(_ttl)
+    from_time = to_time - timedelta(days=100)
+    data = {
+        'timeFrame': 'ONE_DAY',
+        'symbols': ['VN30'],
+        'from': int(from_time.timestamp()),
+        'to': int(to_time.timestamp()),
+    }
+    return headers, data
+
+
+def _parse_vn30(data: list[dict]) -> pd.DataFrame:
+    for d in data:
+        if d['symbol'] == 'VN30':
+            return payload_to_klines(d)
+
+    raise ValueError('VN30 data not found')
+
+
+def _stocks_request(symbols: list[str], days: int) -> tuple[dict, dict]:
+    headers = {'Referer': 'https://trading.vietcap.com.vn/priceboard'}
+    data = {
+        'timeFrame': 'ONE_DAY',
+        'symbols': symbols,
+        'countBack': days,
+        'to': int(floor_time(_ttl).timestamp()),
+    }
+    return headers, data
+
+
+def _parse_stocks(data: Iterable[dict]) -> dict[str, pd.DataFrame]:
+    # With a streamed body each symbol is converted to columns as soon as it is parsed, then dropped
+    return {d['symbol']: payload_to_klines(d) for d in data}
+
+
+async def _aparse_stocks(data: AsyncIterable[dict]) -> dict[str, pd.DataFrame]:
+    return {d['symbol']: payload_to_klines(d) async for d in data}
 
 
 class VciClient(BaseClient):
@@ -26,79 +65,46 @@ class VciClient(BaseClient):
 
     @retry(reraise=True, stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10))
     def get_vn30(self) -> pd.DataFrame:
-        headers = {
-            'Referer': 'https://trading.vietcap.com.vn/price-board'
-        }
-        to_time = datetime.now()
-        from_time = to_time - timedelta(days=100)
-        data = {
-            'timeFrame': 'ONE_DAY',
-            'symbols': ['VN30'],
-            'from': int(from_time.timestamp()),
-            'to': int(to_time.timestamp()),
-        }
-        resp = self._client.post('/api/chart/OHLCChart/gap', headers=headers, json=data)
-        print(f'get_vn30: {resp.request.method} {resp.url} status_code={resp.status_code}')
+        headers, data = _vn30_request()
+        resp = self._request('POST', '/api/chart/OHLCChart/gap', ttl=_ttl, headers=headers, json=data)
+        logger.debug(f'get_vn30: {resp.request.method} {resp.url} status_code={resp.status_code}')
         resp.raise_for_status()
+        return _parse_vn30(resp.json())
 
-        data = resp.json()
-        for d in data:
-            if d['symbol'] == 'VN30':
-                ohlc = OhlcData.model_validate(d)
-                df = pd.DataFrame(
-                    {
-                        'open_time': ohlc.time,
-                        'open': ohlc.open,
-                        'high': ohlc.high,
-                        'low': ohlc.low,
-                        'close': ohlc.close,
-                        'volume': ohlc.volume,
-                    }
-                )
-                df['open_time'] = pd.to_datetime(df['open_time']).dt.tz_localize(None)
-                df['volume'] = df['volume'].astype('float64')
-                return df
-
-        raise ValueError('VN30 data not found')
+    @retry(reraise=True, stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10))
+    def get_stocks(self, symbols: list[str], days: int = 100, stream: bool = False) -> dict[str, pd.DataFrame]:
+        # stream=True keeps memory bounded for large batches, the body is not buffered so it skips the response cache
+        headers, data = _stocks_request(symbols, days)
+        if stream:
+            with self._client.post('/api/chart/OHLCChart/gap-chart', headers=headers, json=data, stream=True) as resp:
+                resp.raise_for_status()
+                return _parse_stocks(iter_json_array(resp.iter_content(_chunk_size)))
+
+        resp = self._request('POST', '/api/chart/OHLCChart/gap-chart', ttl=_ttl, headers=headers, json=data)
+        resp.raise_for_status()
+        return _parse_stocks(resp.json())
+
+
+class AsyncVciClient(AsyncBaseClient):
+    base_url: str = 'https://trading.vietcap.com.vn'
 
     @retry(reraise=True, stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10))
-    def get_stocks(self, symbols: list[str], days: int = 100) -> dict[str, pd.DataFrame]:
-        headers = {
-            'Referer': 'https://trading.vietcap.com.vn/priceboard'
-        }
-        data = {
-            'timeFrame': 'ONE_DAY',
-            'symbols': symbols,
-            'countBack': days,
-            'to': int(datetime.now().timestamp()),
-        }
-        resp = self._client.post('/api/chart/OHLCChart/gap-chart', headers=headers, json=data)
+    async def get_vn30(self) -> pd.DataFrame:
+        headers, data = _vn30_request()
+        resp = await self._client.post('/api/chart/OHLCChart/gap', headers=headers, json=data)
+        logger.debug(f'get_vn30: {resp.request.method} {resp.url} status_code={resp.status_code}')
         resp.raise_for_status()
+        return _parse_vn30(resp.json())
+
+    @retry(reraise=True, stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10))
+    async def get_stocks(self, symbols: list[str], days: int = 100, stream: bool = False) -> dict[str, pd.DataFrame]:
+        headers, data = _stocks_request(symbols, days)
+        if stream:
+            resp = await self._client.post('/api/chart/OHLCChart/gap-chart', headers=headers, json=data, stream=True)
+            async with resp:
+                resp.raise_for_status()
+                return await _aparse_stocks(aiter_json_array(await resp.iter_content(_chunk_size)))
 
-        data = resp.json()
-        data = {
-            d['symbol']: OhlcData.model_validate(d)
-            for d in data
-        }
-
-        data = {
-            symbol: pd.DataFrame(
-                {
-                    'open_time': ohlc.time,
-                    'open': ohlc.open,
-                    'high': ohlc.high,
-                    'low': ohlc.low,
-                    'close': ohlc.close,
-                    'volume': ohlc.volume,
-                }
-            )
-            for symbol, ohlc in data.items()
-        }
-
-        return {
-            symbol: df.assign(
-                open_time=pd.to_datetime(df['open_time']).dt.tz_localize(None),
-                volume=df['volume'].astype('float64'),
-            )
-            for symbol, df in data.items()
-        }
+        resp = await self._client.post('/api/chart/OHLCChart/gap-chart', headers=headers, json=data)
+        resp.raise_for_status()
+        return _parse_stocks(resp.json())
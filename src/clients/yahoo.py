@@ -2,7 +2,8 @@ from contextlib import AbstractContextManager
 from typing import Self
 
 import pandas as pd
-import yfinance as yf
+
+from .ohlc import to_klines
 
 
 class YahooClient(AbstractContextManager):
@@ -13,22 +14,18 @@ class YahooClient(AbstractContextManager):
         return
 
     def _get_data(self, symbol: str, period: str = '2mo') -> pd.DataFrame:
+        import yfinance as yf  # slow to import, only needed here
+
         ticker = yf.Ticker(symbol)
-        history = ticker.history(period=period).reset_index()
-
-        history = history.rename(
-            columns={
-                'Date': 'open_time',
-                'Open': 'open',
-                'High': 'high',
-                'Low': 'low',
-                'Close': 'close',
-                'Volume': 'volume',
-            }
+        history = ticker.history(period=period)
+        return to_klines(
+            history.index.tz_convert(None).to_numpy(),
+            history['Open'].to_numpy(),
+            history['High'].to_numpy(),
+            history['Low'].to_numpy(),
+            history['Close'].to_numpy(),
+            history['Volume'].to_numpy(),
         )
-        history['open_time'] = pd.to_datetime(history['open_time']).dt.tz_convert(None)
-        history['volume'] = history['volume'].astype('float64')
-        return history
 
     def get_gold(self, period: str = '2mo') -> pd.DataFrame:
         return self._get_data('GC=F', period)
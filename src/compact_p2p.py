@@ -0,0 +1,13 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+from loguru import logger
+
+from storage import open_p2p_store
+
+if __name__ == '__main__':
+    # Keep the last 30 days in the CSV, older rows go to data/p2p.parquet
+    store = open_p2p_store()
+    store.compact(keep=30 * 24)
+    logger.info('Compacted p2p history')
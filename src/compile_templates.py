@@ -0,0 +1,16 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import sys
+from pathlib import Path
+
+from loguru import logger
+
+from templates import compile_templates
+
+if __name__ == '__main__':
+    # Set TEMPLATE_COMPILED_DIR to the same directory to render from the compiled modules
+    target = Path(sys.argv[1] if len(sys.argv) > 1 else 'build/templates')
+    compile_templates(target)
+    logger.info(f'Compiled templates into {target}')
@@ -8,3 +8,7 @@ from enum import Enum
 class Interval(Enum):
     H1 = '1h'
     D1 = '1d'
+
+
+# DataFrame.attrs flag set by clients on klines frames they have already normalized
+TRUSTED_KLINES = 'trusted_klines'
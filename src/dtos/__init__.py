@@ -10,5 +10,30 @@ __all__ = [
     'TopVolume',
 ]
 
-from .fgi import Fgi
-from .tops import TopGainer, TopLosser, TopTransaction, TopVolume
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .fgi import Fgi
+    from .tops import TopGainer, TopLosser, TopTransaction, TopVolume
+
+# DTOs are imported on first access, so a script only pays for the models it uses
+_modules = {
+    'Fgi': '.fgi',
+    'TopGainer': '.tops',
+    'TopLosser': '.tops',
+    'TopTransaction': '.tops',
+    'TopVolume': '.tops',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _modules:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(_modules[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -2,26 +2,18 @@ __author__ = 'Khiem Doan'
 __github__ = 'https://github.com/khiemdoan'
 __email__ = 'doankhiem.crazy@gmail.com'
 
-import re
-from datetime import datetime, timezone
+from datetime import UTC, datetime
 from decimal import Decimal
-from typing import Any
+from typing import Annotated
 
-from pydantic import BaseModel
+from pydantic import AfterValidator, BaseModel, ConfigDict
+from pydantic.alias_generators import to_camel
 
-pattern = re.compile(r'(?<!^)(?=[A-Z])')
+# Fields declared with these types get their fix-up after validation, other fields are validated in pydantic-core alone
+UtcDatetime = Annotated[datetime, AfterValidator(lambda value: value.replace(tzinfo=UTC))]
+NormalizedDecimal = Annotated[Decimal, AfterValidator(lambda value: value.normalize())]
 
 
 class Base(BaseModel):
-    def __init__(self, **data: dict[str, Any]) -> None:
-        new_data = {}
-        for key, value in data.items():
-            new_key = pattern.sub('_', key).lower()
-            new_data[new_key] = value
-        super().__init__(**new_data)
-
-        for k, v in self.__dict__.items():
-            if isinstance(v, datetime):
-                setattr(self, k, v.replace(tzinfo=timezone.utc))
-            if isinstance(v, Decimal):
-                setattr(self, k, v.normalize())
+    # camelCase payload keys and snake_case field names are both accepted, the aliases are built once per class
+    model_config = ConfigDict(alias_generator=to_camel, validate_by_name=True, validate_by_alias=True)
@@ -2,14 +2,43 @@ __author__ = 'Khiem Doan'
 __github__ = 'https://github.com/khiemdoan'
 __email__ = 'doankhiem.crazy@gmail.com'
 
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+from functools import cache
 from io import BytesIO
+from typing import Literal
 
+import numpy as np
 import pandas as pd
 import pandera.pandas as pa
-from matplotlib import pyplot as plt
+from matplotlib import dates as mdates
 from matplotlib.axes import Axes
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import to_rgba
 from matplotlib.figure import Figure
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from clients.ohlc import has_valid_values
+from constants import TRUSTED_KLINES
+
+Validation = Literal['strict', 'sample', 'trusted']
+
+
+class GraphSettings(BaseSettings):
+    validation: Validation = 'strict'
+    validation_sample: int = 1000
+
+    model_config = SettingsConfigDict(
+        extra='ignore',
+        env_prefix='GRAPH_',
+        env_file='.env',
+        env_file_encoding='utf-8',
+    )
+
+
+@cache
+def _get_settings() -> GraphSettings:
+    return GraphSettings()
 
 
 class Kline(pa.DataFrameModel):
@@ -21,63 +50,129 @@ class Kline(pa.DataFrameModel):
     volume: float = pa.Field(ge=0)
 
 
-def draw_klines(klines: pd.DataFrame) -> bytes:
-    klines = Kline.validate(klines)
+def _rectangles(x: np.ndarray, width: float, bottom: np.ndarray, height: np.ndarray) -> np.ndarray:
+    left = x - width / 2
+    right = x + width / 2
+    top = bottom + height
+    return np.stack(
+        [
+            np.column_stack([left, bottom]),
+            np.column_stack([left, top]),
+            np.column_stack([right, top]),
+            np.column_stack([right, bottom]),
+        ],
+        axis=1,
+    )
+
+
+class _KlinesFigure:
+    up_color = to_rgba('lime')
+    down_color = to_rgba('tomato')
+
+    def __init__(self) -> None:
+        # Built once per thread and reused, created without pyplot so it is never kept in its registry
+        self.fig = Figure(figsize=(30, 15))
+        self.axes: tuple[Axes, Axes] = self.fig.subplots(2, sharex=True)
+        self.fig.subplots_adjust(
+            left=0.03,
+            bottom=0.1,
+            right=0.97,
+            top=0.95,
+            wspace=0.05,
+            hspace=0.07,
+        )
+
+        # One collection per kind of shape, only their vertices and colors change between charts
+        self.shadows = PolyCollection([], linewidths=0)
+        self.bodies = PolyCollection([], linewidths=0)
+        self.volumes = PolyCollection([], linewidths=0)
+        self.axes[0].add_collection(self.shadows)
+        self.axes[0].add_collection(self.bodies)
+        self.axes[1].add_collection(self.volumes)
+        self.price_line = self.axes[0].axhline(y=0, color='darkviolet')
+        (self.volume_sma_line,) = self.axes[1].plot([], [], color='blue')
+
+        self.axes[1].xaxis_date()
+        self.axes[0].tick_params(axis='y', labelsize=15)
+        self.axes[1].tick_params(axis='y', labelsize=15)
+        self.axes[1].tick_params(axis='x', labelrotation=30, labelsize=15)
+
+    def render(self, klines: pd.DataFrame, body_width: timedelta, shadow_width: timedelta) -> bytes:
+        x = mdates.date2num(klines['open_time'].to_numpy())
+        open_ = klines['open'].to_numpy()
+        high = klines['high'].to_numpy()
+        low = klines['low'].to_numpy()
+        close = klines['close'].to_numpy()
+        volume = klines['volume'].to_numpy()
+        body = body_width / timedelta(days=1)
+        shadow = shadow_width / timedelta(days=1)
+
+        colors = np.where((close > open_)[:, np.newaxis], self.up_color, self.down_color)
+
+        self.bodies.set_verts(_rectangles(x, body, np.minimum(open_, close), np.abs(close - open_)))
+        self.bodies.set_facecolor(colors)
+        self.shadows.set_verts(_rectangles(x, shadow, low, high - low))
+        self.shadows.set_facecolor(colors)
+        self.volumes.set_verts(_rectangles(x, body, np.zeros_like(volume), volume))
+        self.volumes.set_facecolor(colors)
+
+        self.price_line.set_ydata([close[-1], close[-1]])
+        self.volume_sma_line.set_data(x, klines['volume_sma'].to_numpy())
+
+        delta = high.max() - low.min()
+        self.axes[0].set_ylim(low.min() - delta * 0.05, high.max() + delta * 0.05)
+        self.axes[1].set_ylim(0, volume.max() * 1.05)
+        margin = (x.max() - x.min()) * 0.02 + body
+        self.axes[1].set_xlim(x.min() - margin, x.max() + margin)
+
+        with BytesIO() as img:
+            self.fig.savefig(img, format='jpg')
+            img.seek(0)
+            return img.read()
+
+
+_local = threading.local()
+
+
+def _get_figure() -> _KlinesFigure:
+    if not hasattr(_local, 'figure'):
+        _local.figure = _KlinesFigure()
+    return _local.figure
+
+
+def render_klines(klines: pd.DataFrame, body_width: timedelta, shadow_width: timedelta) -> bytes:
+    return _get_figure().render(klines, body_width, shadow_width)
+
+
+def validate_klines(klines: pd.DataFrame, validation: Validation | None = None, tail: int = 50) -> pd.DataFrame:
+    settings = _get_settings()
+    validation = validation or settings.validation
+
+    # The flag is inherited by frames derived from a trusted one, so the values are still checked, only vectorised
+    if validation == 'trusted' and klines.attrs.get(TRUSTED_KLINES, False) and has_valid_values(klines):
+        return klines
+    if validation == 'sample' and len(klines) > settings.validation_sample + tail:
+        # Check the drawn tail plus a random sample of rows, column types are the same on any subset
+        rng = np.random.default_rng(0)
+        rows = np.concatenate(
+            [
+                rng.integers(0, len(klines) - tail, settings.validation_sample),
+                np.arange(len(klines) - tail, len(klines)),
+            ]
+        )
+        Kline.validate(klines.iloc[rows])
+        return klines
+    return Kline.validate(klines)
+
+
+def draw_klines(klines: pd.DataFrame, tail: int = 50, validation: Validation | None = None) -> bytes:
+    klines = validate_klines(klines, validation, tail)
 
-    up_color = 'lime'
-    down_color = 'tomato'
     delta_time = klines['open_time'].diff().min()
     body_width = delta_time * 0.6
     shadow_width = delta_time * 0.2
 
-    klines['volume_sma'] = klines['volume'].rolling(window=10).mean()
-
-    klines = klines.tail(50)
-    price = klines['close'].tail(1).item()
-    up = klines[klines['close'] > klines['open']]
-    down = klines[klines['close'] <= klines['open']]
-
-    fig: Figure
-    axes: tuple[Axes, Axes]
-    fig, axes = plt.subplots(2, figsize=(30, 15), sharex=True)
-
-    if len(up) > 0:
-        axes[0].bar(up['open_time'], up['close'] - up['open'], body_width, up['open'], color=up_color)
-        axes[0].bar(up['open_time'], up['high'] - up['low'], shadow_width, up['low'], color=up_color)
-        axes[1].bar(up['open_time'], up['volume'], body_width, color=up_color)
-
-    if len(down) > 0:
-        axes[0].bar(down['open_time'], down['open'] - down['close'], body_width, down['close'], color=down_color)
-        axes[0].bar(down['open_time'], down['high'] - down['low'], shadow_width, down['low'], color=down_color)
-        axes[1].bar(down['open_time'], down['volume'], body_width, color=down_color)
-
-    axes[0].axhline(y=price, color='darkviolet')
-
-    high = klines['high'].max()
-    low = klines['low'].min()
-
-    delta = high - low
-    top_price = high + delta * 0.05
-    bottom_price = low - delta * 0.05
-
-    axes[0].set_ylim(bottom_price, top_price)
-
-    axes[1].plot(klines['open_time'], klines['volume_sma'], color='blue')
-
-    axes[0].tick_params(axis='y', labelsize=15)
-    axes[1].tick_params(axis='y', labelsize=15)
-    axes[1].tick_params(axis='x', labelrotation=30, labelsize=15)
-
-    plt.subplots_adjust(
-        left=0.03,
-        bottom=0.1,
-        right=0.97,
-        top=0.95,
-        wspace=0.05,
-        hspace=0.07,
-    )
-
-    with BytesIO() as img:
-        fig.savefig(img, format='jpg')
-        img.seek(0)
-        return img.read()
+    # Only the drawn rows plus the SMA window are copied, the caller's frame is never written to
+    klines = klines.tail(tail + 9)
+    klines = klines.assign(volume_sma=klines['volume'].rolling(window=10).mean()).tail(tail)
+    return render_klines(klines, body_width, shadow_width)
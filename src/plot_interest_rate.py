@@ -1,6 +1,7 @@
 import os
 from io import BytesIO
 from pathlib import Path
+from typing import NamedTuple
 
 import matplotlib.pyplot as plt
 import pandas as pd
@@ -10,19 +11,57 @@ from telegram import Telegram
 
 FIG_SIZE = (20, 15)
 TOP_N = 10
+TERMS = (
+    'no_fixed_term',
+    '1_month',
+    '3_months',
+    '6_months',
+    '9_months',
+    '12_months',
+    '18_months',
+    '24_months',
+)
 
 
-def _get_top10_banks(df: pd.DataFrame, term: str) -> list[str]:
-    latest = df.dropna(subset=[term]).sort_values('date', ascending=False).drop_duplicates('bank')
-    return latest.nlargest(TOP_N, term)['bank'].tolist()
+class InterestRates(NamedTuple):
+    history: pd.DataFrame  # indexed by (bank, date)
+    latest: pd.DataFrame  # latest known rate per bank for every term
+    updated: pd.DataFrame  # date of the latest known rate per bank for every term
 
 
-def plot_top10_interest_rates(csv_path: str, term: str = '12_months') -> bytes:
-    df = pd.read_csv(csv_path)
-    df['date'] = pd.to_datetime(df['date'])
+_cache: dict[Path, tuple[tuple[int, int], InterestRates]] = {}
+
+
+def load_interest_rates(csv_path: str | Path) -> InterestRates:
+    # Parsed once per file version, invalidated when mtime or size changes
+    path = Path(csv_path).resolve()
+    stat = path.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    df = pd.read_csv(path, parse_dates=['date'], dtype=dict.fromkeys(TERMS, 'float64'))
+    history = df.set_index(['bank', 'date']).sort_index()
+    # groupby().last() skips NaN, so each term gets the latest date the bank published it
+    latest = history.groupby(level='bank').last()
+    dates = pd.Series(history.index.get_level_values('date'), index=history.index)
+    updated = history.notna().apply(dates.where).groupby(level='bank').max()
+
+    rates = InterestRates(history=history, latest=latest, updated=updated)
+    _cache[path] = (version, rates)
+    return rates
+
 
-    top10_banks = _get_top10_banks(df, term)
-    top10_df = df[df['bank'].isin(top10_banks)]
+def _get_top10_banks(rates: InterestRates, term: str) -> list[str]:
+    # Ties are broken in favour of the most recently updated bank
+    banks = rates.updated[term].sort_values(ascending=False, kind='stable').index
+    return rates.latest.loc[banks, term].dropna().nlargest(TOP_N).index.tolist()
+
+
+def _plot_top10(rates: InterestRates, term: str) -> bytes:
+    top10_banks = _get_top10_banks(rates, term)
+    top10_df = rates.history.loc[top10_banks, [term]].reset_index()
 
     fig, ax = plt.subplots(1)
 
@@ -38,10 +77,15 @@ def plot_top10_interest_rates(csv_path: str, term: str = '12_months') -> bytes:
 
     with BytesIO() as img:
         fig.savefig(img, format='jpg')
+        plt.close(fig)
         img.seek(0)
         return img.read()
 
 
+def plot_top10_interest_rates(csv_path: str, term: str = '12_months') -> bytes:
+    return _plot_top10(load_interest_rates(csv_path), term)
+
+
 def _get_csv_path() -> Path:
     return Path(__file__).resolve().parent.parent / 'data' / 'interest_rates.csv'
 
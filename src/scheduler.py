@@ -0,0 +1,98 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import sys
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import NamedTuple
+
+from loguru import logger
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+import suggest_vn30
+import update_crypto_rsi
+import update_fgi
+import update_gold
+import update_launchpool
+import update_p2p
+import update_tops
+import update_vn30
+from cron import Cron
+
+
+class Job(NamedTuple):
+    name: str
+    cron: Cron
+    func: Callable[[], None]
+
+
+# Schedules are in UTC, the same as the GitHub workflows.
+# Jobs sharing a schedule run one after another in this order.
+# Interest rates are crawled by the Node.js script and committed by their own workflow, so they stay in CI.
+jobs = [
+    Job('crypto_rsi', Cron('0 * * * *'), update_crypto_rsi.main),
+    Job('p2p', Cron('0 * * * *'), update_p2p.main),
+    Job('fgi', Cron('0 1 * * *'), update_fgi.main),
+    Job('vn30', Cron('0 1-10 * * 1-5'), update_vn30.main),
+    Job('suggest_vn30', Cron('0 1-10 * * 1-5'), suggest_vn30.main),
+    Job('gold', Cron('0 10 * * 1-5'), update_gold.main),
+    Job('tops', Cron('0 1 * * *'), update_tops.main),
+    Job('launchpool', Cron('0 2 * * *'), update_launchpool.main),
+]
+
+
+class SchedulerSettings(BaseSettings):
+    # Jobs without a GitHub workflow are off unless they are listed here
+    jobs: list[str] = ['crypto_rsi', 'p2p', 'fgi', 'vn30', 'suggest_vn30']
+
+    model_config = SettingsConfigDict(
+        extra='ignore',
+        env_prefix='SCHEDULER_',
+        env_file='.env',
+        env_file_encoding='utf-8',
+    )
+
+
+def run_job(job: Job) -> None:
+    logger.info(f'Run job {job.name}')
+    start = time.perf_counter()
+    try:
+        job.func()
+    except Exception:
+        # One failing job must not stop the daemon
+        logger.exception(f'Job {job.name} failed')
+    else:
+        logger.info(f'Job {job.name} done in {time.perf_counter() - start:.1f}s')
+
+
+def run(jobs: list[Job]) -> None:
+    now = datetime.now(UTC)
+    while True:
+        next_time = min(job.cron.next_after(now) for job in jobs)
+        logger.info(f'Next run at {next_time:%Y-%m-%d %H:%M} UTC')
+        time.sleep(max((next_time - datetime.now(UTC)).total_seconds(), 0))
+
+        for job in jobs:
+            if job.cron.match(next_time):
+                run_job(job)
+
+        # Runs missed while the jobs were busy are skipped, not replayed
+        now = max(next_time, datetime.now(UTC))
+
+
+def main() -> None:
+    # `scheduler.py fgi p2p` runs the given jobs once, without arguments it runs as a daemon
+    by_name = {job.name: job for job in jobs}
+    if len(sys.argv) > 1:
+        for name in sys.argv[1:]:
+            run_job(by_name[name])
+        return
+
+    settings = SchedulerSettings()
+    run([by_name[name] for name in settings.jobs])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import os
+from io import StringIO
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+
+class AppendOnlyCsv:
+    _block_size = 64 * 1024
+
+    def __init__(self, file: Path, dtypes: dict[str, str]) -> None:
+        self._file = file
+        self._archive = file.with_suffix('.parquet')
+        self._dtypes = dtypes
+
+    def _empty(self) -> pd.DataFrame:
+        return pd.DataFrame(columns=list(self._dtypes)).astype(self._dtypes)
+
+    def _is_empty(self) -> bool:
+        return not self._file.exists() or self._file.stat().st_size == 0
+
+    def append(self, row: dict[str, Any]) -> None:
+        df = pd.DataFrame({k: [v] for k, v in row.items()}).astype(self._dtypes)
+        header = self._is_empty()
+        with self._file.open('a+b') as f:
+            if not header:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+            f.write(df.to_csv(header=header, index=False).encode())
+
+    def tail(self, n: int) -> pd.DataFrame:
+        # Read blocks backward from the end of the file until it has enough lines
+        if self._is_empty():
+            df = self._empty()
+        else:
+            with self._file.open('rb') as f:
+                header = f.readline()
+                start = f.tell()
+                end = f.seek(0, os.SEEK_END)
+                pos = end
+                data = b''
+                while pos > start and data.count(b'\n') <= n:
+                    size = min(self._block_size, pos - start)
+                    pos -= size
+                    f.seek(pos)
+                    data = f.read(size) + data
+            lines = data.splitlines(keepends=True)
+            if pos > start:
+                lines = lines[1:]  # first line may be cut in the middle
+            content = (header + b''.join(lines[-n:])).decode()
+            df = pd.read_csv(StringIO(content)).astype(self._dtypes)
+
+        if len(df) < n and self._archive.exists():
+            archive = pd.read_parquet(self._archive).tail(n - len(df))
+            df = pd.concat([archive, df], ignore_index=True)
+        return df.reset_index(drop=True)
+
+    def read(self) -> pd.DataFrame:
+        frames = []
+        if self._archive.exists():
+            frames.append(pd.read_parquet(self._archive))
+        if not self._is_empty():
+            frames.append(pd.read_csv(self._file).astype(self._dtypes))
+        if not frames:
+            return self._empty()
+        return pd.concat(frames, ignore_index=True)
+
+    def compact(self, keep: int) -> None:
+        # Move everything but the last `keep` rows into the Parquet archive
+        df = pd.read_csv(self._file).astype(self._dtypes) if not self._is_empty() else self._empty()
+        if len(df) <= keep:
+            return
+
+        old = df.iloc[: len(df) - keep]
+        if self._archive.exists():
+            old = pd.concat([pd.read_parquet(self._archive), old], ignore_index=True)
+        old.to_parquet(self._archive, index=False)
+        df.iloc[len(df) - keep :].to_csv(self._file, index=False)
+
+
+p2p_dtypes = {'time': 'datetime64[s]', 'price': 'int64'}
+
+
+def open_p2p_store() -> AppendOnlyCsv:
+    data_dir = Path('data')
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return AppendOnlyCsv(data_dir / 'p2p.csv', p2p_dtypes)
@@ -2,21 +2,21 @@ __author__ = 'Khiem Doan'
 __github__ = 'https://github.com/khiemdoan'
 __email__ = 'doankhiem.crazy@gmail.com'
 
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from collections.abc import Sequence
 from datetime import datetime, timedelta
 from io import BytesIO
 from zoneinfo import ZoneInfo
 
 import pandas as pd
 import seaborn as sns
-import talib
 from httpx import Client
 from loguru import logger
 from matplotlib import pyplot as plt
-from pydantic import BaseModel
 from tenacity import retry, stop_after_attempt, wait_exponential
 
-from clients import VciClient
+from clients import AsyncVciClient, rate_limit
+from clients.ohlc import payload_to_klines
 from telegram import Telegram
 
 vn30_list = (
@@ -53,16 +53,6 @@ vn30_list = (
 )
 
 
-class VpsResponse(BaseModel):
-    symbol: str
-    t: list[int]  # timestamps
-    c: list[float]  # closing prices
-    o: list[float]  # opening prices
-    h: list[float]  # high prices
-    l: list[float]  # low prices
-    v: list[int]  # volumes
-
-
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10))
 def fetch_stock_data(symbol: str) -> pd.DataFrame:
     logger.info(f'Fetching data for {symbol}')
@@ -76,56 +66,69 @@ def fetch_stock_data(symbol: str) -> pd.DataFrame:
         'to': end_time.timestamp(),
     }
 
-    with Client(base_url='https://histdatafeed.vps.com.vn', http2=True, timeout=10.0) as client:
+    with Client(
+        base_url='https://histdatafeed.vps.com.vn', http2=True, timeout=10.0, event_hooks=rate_limit.httpx_hooks
+    ) as client:
         resp = client.get('/tradingview/history', params=params)
         resp.raise_for_status()
 
-    data = VpsResponse.model_validate_json(resp.content)
-
-    df = pd.DataFrame(
-        {
-            'open_time': pd.to_datetime(data.t, unit='s'),
-            'open': data.o,
-            'high': data.h,
-            'low': data.l,
-            'close': data.c,
-            'volume': data.v,
-        }
-    )
+    df = payload_to_klines(resp.json())
+
+    logger.info(f'Successfully fetched data for {symbol}')
+
+    return _add_indicators(df)
+
+
+def _add_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    import talib
 
     df['rsi'] = talib.RSI(df['close'], timeperiod=14)
     df['upper'], df['middle'], df['lower'] = talib.BBANDS(df['close'], timeperiod=14)
     df['ratio'] = (df['close'] - df['middle']) / (df['upper'] - df['middle'])
+    return df
 
-    logger.info(f'Successfully fetched data for {symbol}')
 
-    return df
+async def fetch_stocks_data_vci(
+    symbols: Sequence[str],
+    days: int = 130,
+    batch_size: int = 10,
+    concurrency: int = 3,
+) -> dict[str, pd.DataFrame]:
+    # One session for every batch, symbols missing from a batch response are refetched one by one
+    semaphore = asyncio.Semaphore(concurrency)
 
+    async with AsyncVciClient() as client:
 
-def fetch_stock_data_vci(symbol: str) -> pd.DataFrame:
-    logger.info(f'Fetching data for {symbol} from VCI')
+        async def fetch(batch: list[str]) -> dict[str, pd.DataFrame]:
+            async with semaphore:
+                logger.info(f'Fetching data for {", ".join(batch)} from VCI')
+                return await client.get_stocks(batch, days, stream=True)
 
-    with VciClient() as client:
-        dfs = client.get_stocks([symbol], days=130)
+        batches = [list(symbols[i : i + batch_size]) for i in range(0, len(symbols), batch_size)]
+        data: dict[str, pd.DataFrame] = {}
+        for result in await asyncio.gather(*(fetch(batch) for batch in batches)):
+            data.update({symbol: df for symbol, df in result.items() if not df.empty})
 
-    # Rename 'time' to 'open_time' to match VPS format
-    df = dfs[symbol].rename(columns={'time': 'open_time'})
+        missing = [symbol for symbol in symbols if symbol not in data]
+        if missing:
+            logger.warning(f'Missing from batch response: {", ".join(missing)}')
+            for result in await asyncio.gather(*(fetch([symbol]) for symbol in missing)):
+                data.update(result)
 
-    df['rsi'] = talib.RSI(df['close'], timeperiod=14)
-    df['upper'], df['middle'], df['lower'] = talib.BBANDS(df['close'], timeperiod=14)
-    df['ratio'] = (df['close'] - df['middle']) / (df['upper'] - df['middle'])
+    not_found = [symbol for symbol in symbols if symbol not in data]
+    if not_found:
+        raise ValueError(f'Data not found for {", ".join(not_found)}')
 
-    logger.info(f'Successfully fetched data for {symbol} from VCI')
+    logger.info(f'Successfully fetched data for {len(data)} symbols from VCI')
 
-    return df
+    return {symbol: _add_indicators(data[symbol]) for symbol in symbols}
 
 
 def main():
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        data = list(executor.map(fetch_stock_data_vci, vn30_list))
+    data = asyncio.run(fetch_stocks_data_vci(vn30_list))
 
     ohlc_data: dict[str, pd.DataFrame] = {}
-    for symbol, df in zip(vn30_list, data):
+    for symbol, df in data.items():
         ohlc_data[symbol] = df.tail(50)
 
     ratio_data: dict[str, float] = {}
@@ -175,6 +178,7 @@ def main():
 
     with BytesIO() as img, Telegram() as tele:
         fig.savefig(img, format='jpg')
+        plt.close(fig)
         img.seek(0)
         tele.send_photo(img.read(), caption=caption)
 
@@ -2,18 +2,40 @@ __author__ = 'Khiem Doan'
 __github__ = 'https://github.com/khiemdoan'
 __email__ = 'doankhiem.crazy@gmail.com'
 
+import asyncio
+import json
 import re
-from contextlib import AbstractContextManager
+import threading
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
 from io import BytesIO
-from typing import Any, Literal, Self
+from itertools import islice
+from typing import Annotated, Any, Literal, Self
 
-from niquests import Session
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from loguru import logger
+from niquests import AsyncSession, RequestException
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
+
+from clients import rate_limit
+from clients.base import get_session
+from clients.rate_limit import TokenBucket
+from clients.resolver import get_async_resolver
+
+ParseMode = Literal['HTML', 'MarkdownV2'] | None
+# Raw image, or the file_id of a photo Telegram already has
+Photo = bytes | BytesIO | str
+
+# sendMediaGroup takes 2 to 10 photos
+_media_group_size = 10
+_max_attempts = 5
 
 
 class TelegramSettings(BaseSettings):
     bot_token: str
-    chat_id: str
+    # One chat or several, separated by commas
+    chat_id: Annotated[list[str], NoDecode]
+    # Messages per second to a single chat
+    chat_rate: float = 1.0
 
     model_config = SettingsConfigDict(
         extra='ignore',
@@ -22,59 +44,325 @@ class TelegramSettings(BaseSettings):
         env_file_encoding='utf-8',
     )
 
+    @field_validator('chat_id', mode='before')
+    @classmethod
+    def _split_chat_ids(cls, value: Any) -> Any:
+        if isinstance(value, str | int):
+            value = [chat_id.strip() for chat_id in str(value).split(',') if chat_id.strip()]
+        if not value:
+            raise ValueError('at least one chat id is required')
+        return value
+
+
+_chat_buckets: dict[str, TokenBucket] = {}
+_chat_buckets_lock = threading.Lock()
+
+
+def _chat_bucket(chat_id: str, rate: float) -> TokenBucket:
+    with _chat_buckets_lock:
+        bucket = _chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(rate, 1)
+            _chat_buckets[chat_id] = bucket
+        return bucket
+
+
+def _read_photo(photo: bytes | BytesIO) -> bytes:
+    if isinstance(photo, BytesIO):
+        photo.seek(0)
+        return photo.read()
+    return photo
 
-class Telegram(AbstractContextManager):
+
+def _file_id(message: dict) -> str:
+    # Telegram keeps several sizes of a photo, the last one is the original
+    return message['photo'][-1]['file_id']
+
+
+def _log_mirror_failure(chat_id: str, error: RequestException) -> None:
+    # The error text is not logged, the request URL in it carries the bot token
+    status_code = getattr(error.response, 'status_code', None)
+    logger.error(f'Telegram send to chat {chat_id} failed: {type(error).__name__} status_code={status_code}')
+
+
+def _retry_after(resp) -> float | None:
+    # Flood control answers 429 with the seconds to wait in parameters.retry_after
+    if resp.status_code != 429:
+        return None
+    try:
+        return float(resp.json()['parameters']['retry_after'])
+    except KeyError, TypeError, ValueError:
+        return 1.0
+
+
+class _TelegramBase:
     escape_pattern = re.compile(rf'([{re.escape(r"\_*[]()~`>#+-=|{}.!")}])')
 
     def __init__(self) -> None:
         self._settings = TelegramSettings()
+        self._chat_ids = self._settings.chat_id
+        self._buckets = {chat_id: _chat_bucket(chat_id, self._settings.chat_rate) for chat_id in self._chat_ids}
+        self._queue: list[tuple[str, dict[str, Any]]] = []
 
-    def __enter__(self) -> Self:
-        self._client = Session(base_url='https://api.telegram.org', resolver=['doh+google://', 'doh+cloudflare://'])
-        return self
-
-    def __exit__(self, exc_type, exc_value, traceback) -> None:
-        self._client.close()
-
-    def send_message(
-        self,
-        text: str,
-        *,
-        parse_mode: Literal['HTML', 'MarkdownV2'] | None = None,
-        preview: bool = False,
-    ) -> Any:
+    def _escape(self, text: str, parse_mode: ParseMode) -> str:
         if parse_mode == 'MarkdownV2':
             text = re.sub(self.escape_pattern, r'\\\1', text)
+        return text
+
+    def _message_request(self, chat_id: str, text: str, parse_mode: ParseMode, preview: bool) -> tuple[str, dict]:
         path = f'/bot{self._settings.bot_token}/sendMessage'
         payload = {
-            'chat_id': self._settings.chat_id,
-            'text': text,
+            'chat_id': chat_id,
+            'text': self._escape(text, parse_mode),
             'parse_mode': parse_mode,
             'disable_web_page_preview': not preview,
         }
-        resp = self._client.post(path, data=payload)
-        resp.raise_for_status()
-        return resp.json()
+        return path, payload
 
-    def send_photo(
+    def _photo_request(
         self,
-        photo: bytes | BytesIO,
+        chat_id: str,
+        photo: Photo,
         caption: str,
-        *,
-        parse_mode: Literal['HTML', 'MarkdownV2'] | None = None,
-    ) -> Any:
-        if parse_mode == 'MarkdownV2':
-            caption = re.sub(self.escape_pattern, r'\\\1', caption)
+        parse_mode: ParseMode,
+    ) -> tuple[str, dict, dict | None]:
         path = f'/bot{self._settings.bot_token}/sendPhoto'
         payload = {
-            'chat_id': self._settings.chat_id,
-            'caption': caption,
+            'chat_id': chat_id,
+            'caption': self._escape(caption, parse_mode),
             'parse_mode': parse_mode,
         }
-        if isinstance(photo, BytesIO):
-            photo.seek(0)
-            photo = photo.read()
-        files = {'photo': photo}
-        resp = self._client.post(path, data=payload, files=files)
+        if isinstance(photo, str):
+            payload['photo'] = photo
+            return path, payload, None
+        files = {'photo': _read_photo(photo)}
+        return path, payload, files
+
+    def _media_group_request(
+        self,
+        chat_id: str,
+        photos: list[tuple[Photo, str]],
+        parse_mode: ParseMode,
+    ) -> tuple[str, dict, dict]:
+        path = f'/bot{self._settings.bot_token}/sendMediaGroup'
+        media = [
+            {
+                'type': 'photo',
+                'media': photo if isinstance(photo, str) else f'attach://photo{i}',
+                'caption': self._escape(caption, parse_mode),
+                'parse_mode': parse_mode,
+            }
+            for i, (photo, caption) in enumerate(photos)
+        ]
+        payload = {
+            'chat_id': chat_id,
+            'media': json.dumps(media),
+        }
+        files = {f'photo{i}': _read_photo(photo) for i, (photo, _) in enumerate(photos) if not isinstance(photo, str)}
+        return path, payload, files
+
+    def queue_message(self, text: str, *, parse_mode: ParseMode = None, preview: bool = False) -> None:
+        self._queue.append(('message', {'text': text, 'parse_mode': parse_mode, 'preview': preview}))
+
+    def queue_photo(self, photo: Photo, caption: str, *, parse_mode: ParseMode = None) -> None:
+        self._queue.append(('photo', {'photo': photo, 'caption': caption, 'parse_mode': parse_mode}))
+
+    def _next_batch(self) -> tuple[str, dict[str, Any], int]:
+        # Queued messages keep their order, consecutive photos with the same parse mode are coalesced into an album.
+        # The number of queued items the batch covers is returned, they are removed only once it is sent.
+        kind, kwargs = self._queue[0]
+        if kind == 'message':
+            return kind, kwargs, 1
+        photos = []
+        for item_kind, item in islice(self._queue, _media_group_size):
+            if item_kind != 'photo' or item['parse_mode'] != kwargs['parse_mode']:
+                break
+            photos.append((item['photo'], item['caption']))
+        return 'photos', {'photos': photos, 'parse_mode': kwargs['parse_mode']}, len(photos)
+
+    def _drop_queue(self) -> None:
+        if self._queue:
+            logger.warning(f'Dropping {len(self._queue)} queued Telegram messages after an error')
+            self._queue.clear()
+
+
+class Telegram(_TelegramBase, AbstractContextManager):
+    def __enter__(self) -> Self:
+        # Flood control is handled per chat in _post, not by pausing the whole host
+        self._client = get_session('https://api.telegram.org', observe=False)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # The session is shared with later messages of the process, it is closed at exit
+        if exc_type is None:
+            self.flush()
+        else:
+            self._drop_queue()
+
+    def _post(self, chat_id: str, path: str, data: dict, files: dict | None = None) -> Any:
+        bucket = self._buckets[chat_id]
+        for attempt in range(_max_attempts):
+            bucket.acquire()
+            resp = self._client.post(path, data=data, files=files)
+            retry_after = _retry_after(resp)
+            if retry_after is None or attempt == _max_attempts - 1:
+                break
+            logger.warning(f'Telegram flood control in {chat_id}, retry after {retry_after}s')
+            bucket.pause(retry_after)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _post_mirror(self, chat_id: str, path: str, data: dict, files: dict | None = None) -> Any | None:
+        # The first chat already has the message, a failing mirror chat does not stop the others
+        try:
+            return self._post(chat_id, path, data, files)
+        except RequestException as e:
+            _log_mirror_failure(chat_id, e)
+            return None
+
+    # Every chat gets the message, the response of the first chat is returned
+
+    def send_message(self, text: str, *, parse_mode: ParseMode = None, preview: bool = False) -> Any:
+        first, *others = self._chat_ids
+        result = self._post(first, *self._message_request(first, text, parse_mode, preview))
+        for chat_id in others:
+            self._post_mirror(chat_id, *self._message_request(chat_id, text, parse_mode, preview))
+        return result
+
+    def send_photo(self, photo: Photo, caption: str, *, parse_mode: ParseMode = None) -> Any:
+        first, *others = self._chat_ids
+        result = self._post(first, *self._photo_request(first, photo, caption, parse_mode))
+        # The image is uploaded once, the other chats reuse its file_id
+        file_id = _file_id(result['result'])
+        for chat_id in others:
+            self._post_mirror(chat_id, *self._photo_request(chat_id, file_id, caption, parse_mode))
+        return result
+
+    def _send_album(self, photos: list[tuple[Photo, str]], parse_mode: ParseMode) -> Any:
+        first, *others = self._chat_ids
+        result = self._post(first, *self._media_group_request(first, photos, parse_mode))
+        photos = [(_file_id(message), caption) for message, (_, caption) in zip(result['result'], photos, strict=True)]
+        for chat_id in others:
+            self._post_mirror(chat_id, *self._media_group_request(chat_id, photos, parse_mode))
+        return result
+
+    def send_media_group(self, photos: list[tuple[Photo, str]], *, parse_mode: ParseMode = None) -> list[Any]:
+        results = []
+        for i in range(0, len(photos), _media_group_size):
+            chunk = photos[i : i + _media_group_size]
+            if len(chunk) == 1:
+                results.append(self.send_photo(*chunk[0], parse_mode=parse_mode))
+            else:
+                results.append(self._send_album(chunk, parse_mode))
+        return results
+
+    def flush(self) -> list[Any]:
+        # A failed send leaves it and everything after it queued
+        results = []
+        while self._queue:
+            kind, kwargs, count = self._next_batch()
+            if kind == 'message':
+                results.append(self.send_message(**kwargs))
+            else:
+                results.extend(self.send_media_group(**kwargs))
+            del self._queue[:count]
+        return results
+
+
+class AsyncTelegram(_TelegramBase, AbstractAsyncContextManager):
+    async def __aenter__(self) -> Self:
+        self._client = AsyncSession(
+            base_url='https://api.telegram.org',
+            resolver=get_async_resolver(),
+            hooks={'pre_request': [rate_limit.before_request_async]},
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if exc_type is None:
+                await self.flush()
+            else:
+                self._drop_queue()
+        finally:
+            await self._client.close()
+
+    async def _post(self, chat_id: str, path: str, data: dict, files: dict | None = None) -> Any:
+        bucket = self._buckets[chat_id]
+        for attempt in range(_max_attempts):
+            await bucket.acquire_async()
+            resp = await self._client.post(path, data=data, files=files)
+            retry_after = _retry_after(resp)
+            if retry_after is None or attempt == _max_attempts - 1:
+                break
+            logger.warning(f'Telegram flood control in {chat_id}, retry after {retry_after}s')
+            bucket.pause(retry_after)
         resp.raise_for_status()
         return resp.json()
+
+    async def _post_mirror(self, chat_id: str, path: str, data: dict, files: dict | None = None) -> Any | None:
+        try:
+            return await self._post(chat_id, path, data, files)
+        except RequestException as e:
+            _log_mirror_failure(chat_id, e)
+            return None
+
+    async def send_message(self, text: str, *, parse_mode: ParseMode = None, preview: bool = False) -> Any:
+        # Chats are independent, so they are sent to concurrently
+        first, *others = self._chat_ids
+        results = await asyncio.gather(
+            self._post(first, *self._message_request(first, text, parse_mode, preview)),
+            *(
+                self._post_mirror(chat_id, *self._message_request(chat_id, text, parse_mode, preview))
+                for chat_id in others
+            ),
+        )
+        return results[0]
+
+    async def send_photo(self, photo: Photo, caption: str, *, parse_mode: ParseMode = None) -> Any:
+        first, *others = self._chat_ids
+        result = await self._post(first, *self._photo_request(first, photo, caption, parse_mode))
+        # The image is uploaded once, the other chats reuse its file_id
+        file_id = _file_id(result['result'])
+        await asyncio.gather(
+            *(
+                self._post_mirror(chat_id, *self._photo_request(chat_id, file_id, caption, parse_mode))
+                for chat_id in others
+            )
+        )
+        return result
+
+    async def _send_album(self, photos: list[tuple[Photo, str]], parse_mode: ParseMode) -> Any:
+        first, *others = self._chat_ids
+        result = await self._post(first, *self._media_group_request(first, photos, parse_mode))
+        photos = [(_file_id(message), caption) for message, (_, caption) in zip(result['result'], photos, strict=True)]
+        await asyncio.gather(
+            *(self._post_mirror(chat_id, *self._media_group_request(chat_id, photos, parse_mode)) for chat_id in others)
+        )
+        return result
+
+    async def send_media_group(
+        self,
+        photos: list[tuple[Photo, str]],
+        *,
+        parse_mode: ParseMode = None,
+    ) -> list[Any]:
+        results = []
+        for i in range(0, len(photos), _media_group_size):
+            chunk = photos[i : i + _media_group_size]
+            if len(chunk) == 1:
+                results.append(await self.send_photo(*chunk[0], parse_mode=parse_mode))
+            else:
+                results.append(await self._send_album(chunk, parse_mode))
+        return results
+
+    async def flush(self) -> list[Any]:
+        results = []
+        while self._queue:
+            kind, kwargs, count = self._next_batch()
+            if kind == 'message':
+                results.append(await self.send_message(**kwargs))
+            else:
+                results.extend(await self.send_media_group(**kwargs))
+            del self._queue[:count]
+        return results
@@ -6,24 +6,111 @@ __url__ = 'https://github.com/khiemdoan/clean-architecture-python-boilerplate/bl
 __all__ = [
     'Render',
     'AsyncRender',
+    'compile_templates',
 ]
 
+import hashlib
+import json
+from collections.abc import MutableMapping
+from functools import cache
 from pathlib import Path
 from typing import Any
 
-from jinja2 import FileSystemLoader, select_autoescape
+from jinja2 import (
+    BaseLoader,
+    ChoiceLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    ModuleLoader,
+    Template,
+    TemplateNotFound,
+    select_autoescape,
+)
 from jinja2.nativetypes import NativeEnvironment
+from loguru import logger
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+_template_dir = Path(__file__).parent
+# Hashes of the sources the compiled modules were built from, written next to them
+_manifest = 'sources.json'
+
+
+class TemplateSettings(BaseSettings):
+    # Compiled bytecode of the templates, reused across runs
+    cache_dir: Path | None = None
+    # Templates precompiled by `compile_templates`, used before the sources
+    compiled_dir: Path | None = None
+
+    model_config = SettingsConfigDict(
+        extra='ignore',
+        env_prefix='TEMPLATE_',
+        env_file='.env',
+        env_file_encoding='utf-8',
+    )
+
+
+def _source_hash(file: Path) -> str:
+    return hashlib.sha256(file.read_bytes()).hexdigest()
+
+
+class _CompiledLoader(ModuleLoader):
+    # Serves a compiled module only while its source is unchanged, an edited template is rendered from the source
+    def __init__(self, path: Path, source_dir: Path) -> None:
+        super().__init__(path)
+        self._source_dir = source_dir
+        try:
+            self._hashes = json.loads((path / _manifest).read_text())
+        except FileNotFoundError, ValueError:
+            self._hashes = {}
+
+    def load(self, environment: Environment, name: str, globals: MutableMapping[str, Any] | None = None) -> Template:
+        source = self._source_dir / name
+        if source.exists() and _source_hash(source) != self._hashes.get(name):
+            logger.warning(f'Compiled template {name} is stale, rendering it from the source')
+            raise TemplateNotFound(name)
+        return super().load(environment, name, globals)
+
+
+def _create_environment(
+    enable_async: bool = False,
+    cache_dir: Path | None = None,
+    compiled_dir: Path | None = None,
+) -> NativeEnvironment:
+    loader: BaseLoader = FileSystemLoader(_template_dir)
+    # Precompiled modules hold sync render functions, the async environment always compiles the sources
+    if compiled_dir is not None and not enable_async:
+        loader = ChoiceLoader([_CompiledLoader(compiled_dir, _template_dir), loader])
+    bytecode_cache = FileSystemBytecodeCache(cache_dir) if cache_dir is not None else None
+    autoescape = select_autoescape()
+    return NativeEnvironment(
+        loader=loader,
+        autoescape=autoescape,
+        enable_async=enable_async,
+        bytecode_cache=bytecode_cache,
+    )
+
+
+@cache
+def _get_environment(enable_async: bool) -> NativeEnvironment:
+    # One environment per mode for the whole process, so compiled templates are reused between renders
+    settings = TemplateSettings()
+    if settings.cache_dir is not None:
+        settings.cache_dir.mkdir(parents=True, exist_ok=True)
+    return _create_environment(enable_async, settings.cache_dir, settings.compiled_dir)
+
+
+def compile_templates(target: Path) -> None:
+    # Writes every *.j2 template as a Python module, loaded later through TEMPLATE_COMPILED_DIR
+    env = _create_environment()
+    env.compile_templates(target, extensions=['j2'], zip=None, ignore_errors=False)
+    hashes = {name: _source_hash(_template_dir / name) for name in env.list_templates(extensions=['j2'])}
+    (target / _manifest).write_text(json.dumps(hashes, indent=2))
 
 
 class Render:
     def __init__(self) -> None:
-        this_dir = Path(__file__).parent
-        loader = FileSystemLoader(this_dir)
-        autoescape = select_autoescape()
-        self._env = NativeEnvironment(
-            loader=loader,
-            autoescape=autoescape,
-        )
+        self._env = _get_environment(False)
 
     def __call__(self, file: str, context: dict[str, Any], **kwargs) -> str:
         template = self._env.get_template(file)
@@ -32,14 +119,7 @@ class Render:
 
 class AsyncRender:
     def __init__(self) -> None:
-        this_dir = Path(__file__).parent
-        loader = FileSystemLoader(this_dir)
-        autoescape = select_autoescape()
-        self._env = NativeEnvironment(
-            loader=loader,
-            autoescape=autoescape,
-            enable_async=True,
-        )
+        self._env = _get_environment(True)
 
     async def __call__(self, file: str, context: dict[str, Any], **kwargs) -> str:
         template = self._env.get_template(file)
@@ -1,73 +1,141 @@
-from copy import copy
-from typing import Self
+from typing import NamedTuple, Self
 
-from httpx import Client
+import numpy as np
+from httpx import AsyncClient, Client
 
+from clients import rate_limit
 from dtos import TopGainer, TopLosser, TopTransaction, TopVolume
 
 
-class TradingView:
-    _path = '/coin/scan'
-    _base_payload = {
+class Tops(NamedTuple):
+    gainers: list[TopGainer]
+    lossers: list[TopLosser]
+    transactions: list[TopTransaction]
+    volumes: list[TopVolume]
+
+
+def _top_indices(values: np.ndarray, n: int, descending: bool) -> np.ndarray:
+    # Partial sort: only the n best rows are fully ordered, rows without a value are left out
+    index = np.flatnonzero(~np.isnan(values))
+    keys = -values[index] if descending else values[index]
+    if len(index) > n:
+        part = np.argpartition(keys, n - 1)[:n]
+        index, keys = index[part], keys[part]
+    return index[np.argsort(keys, kind='stable')]
+
+
+def _payload(columns: list[str], sort_by: str, sort_order: str, size: int = 20) -> dict:
+    return {
         'markets': ['coin'],
-        'range': [0, 20],
+        'range': [0, size],
+        'columns': columns,
+        'sort': {'sortBy': sort_by, 'sortOrder': sort_order},
     }
 
+
+_gainers_payload = _payload(['base_currency', '24h_close_change|5'], '24h_close_change|5', 'desc')
+_lossers_payload = _payload(['base_currency', '24h_close_change|5'], '24h_close_change|5', 'asc')
+_transactions_payload = _payload(['base_currency', 'txs_count'], 'txs_count', 'desc')
+_volumes_payload = _payload(['base_currency', '24h_vol_cmc'], '24h_vol_cmc', 'desc')
+
+
+def _tops_payload(universe: int) -> dict:
+    # One scan of the `universe` coins with the highest volume serves every ranking
+    columns = ['base_currency', '24h_close_change|5', 'txs_count', '24h_vol_cmc']
+    return _payload(columns, '24h_vol_cmc', 'desc', universe)
+
+
+def _rows(data: dict) -> list[list]:
+    # An empty scan may come back with "data": null
+    return [d['d'] for d in data.get('data') or []]
+
+
+def _parse_tops(rows: list[list], n: int) -> Tops:
+    # There is nothing to unpack into the four columns from an empty scan
+    if not rows:
+        return Tops([], [], [], [])
+
+    symbols, change, transaction, volume = zip(*rows, strict=True)
+    change = np.array(change, dtype=np.float64)
+    transaction = np.array(transaction, dtype=np.float64)
+    volume = np.array(volume, dtype=np.float64)
+
+    return Tops(
+        gainers=[TopGainer(symbol=symbols[i], change=change[i]) for i in _top_indices(change, n, True)],
+        lossers=[TopLosser(symbol=symbols[i], change=change[i]) for i in _top_indices(change, n, False)],
+        transactions=[
+            TopTransaction(symbol=symbols[i], transaction=int(transaction[i]))
+            for i in _top_indices(transaction, n, True)
+        ],
+        volumes=[TopVolume(symbol=symbols[i], volume=volume[i]) for i in _top_indices(volume, n, True)],
+    )
+
+
+class TradingView:
+    _path = '/coin/scan'
+
     def __enter__(self) -> Self:
-        self._client = Client(base_url='https://scanner.tradingview.com', http2=True)
+        self._client = Client(
+            base_url='https://scanner.tradingview.com', http2=True, event_hooks=rate_limit.httpx_hooks
+        )
         return self
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
         self._client.close()
 
-    def get_top_gainers(self) -> list[TopGainer]:
-        payload = copy(self._base_payload)
-        payload.update(
-            {
-                'columns': ['base_currency', '24h_close_change|5'],
-                'sort': {'sortBy': '24h_close_change|5', 'sortOrder': 'desc'},
-            }
-        )
+    def _scan(self, payload: dict) -> list[list]:
         resp = self._client.post(self._path, json=payload)
-        data = resp.json()
-        data = [{'symbol': d['d'][0], 'change': d['d'][1]} for d in data['data']]
-        return [TopGainer(**d) for d in data]
+        return _rows(resp.json())
+
+    def get_top_gainers(self) -> list[TopGainer]:
+        return [TopGainer(symbol=d[0], change=d[1]) for d in self._scan(_gainers_payload)]
 
     def get_top_lossers(self) -> list[TopLosser]:
-        payload = copy(self._base_payload)
-        payload.update(
-            {
-                'columns': ['base_currency', '24h_close_change|5'],
-                'sort': {'sortBy': '24h_close_change|5', 'sortOrder': 'asc'},
-            }
-        )
-        resp = self._client.post(self._path, json=payload)
-        data = resp.json()
-        data = [{'symbol': d['d'][0], 'change': d['d'][1]} for d in data['data']]
-        return [TopLosser(**d) for d in data]
+        return [TopLosser(symbol=d[0], change=d[1]) for d in self._scan(_lossers_payload)]
 
     def get_top_transactions(self) -> list[TopTransaction]:
-        payload = copy(self._base_payload)
-        payload.update(
-            {
-                'columns': ['base_currency', 'txs_count'],
-                'sort': {'sortBy': 'txs_count', 'sortOrder': 'desc'},
-            }
-        )
-        resp = self._client.post(self._path, json=payload)
-        data = resp.json()
-        data = [{'symbol': d['d'][0], 'transaction': d['d'][1]} for d in data['data']]
-        return [TopTransaction(**d) for d in data]
+        return [TopTransaction(symbol=d[0], transaction=d[1]) for d in self._scan(_transactions_payload)]
 
     def get_top_volumes(self) -> list[TopVolume]:
-        payload = copy(self._base_payload)
-        payload.update(
-            {
-                'columns': ['base_currency', '24h_vol_cmc'],
-                'sort': {'sortBy': '24h_vol_cmc', 'sortOrder': 'desc'},
-            }
+        return [TopVolume(symbol=d[0], volume=d[1]) for d in self._scan(_volumes_payload)]
+
+    def get_tops(self, n: int = 20, universe: int = 1000) -> Tops:
+        """Rank the `universe` coins with the highest 24h volume.
+
+        Gainers, losers and transactions are ranked inside that set only, a small coin outside it
+        never shows up, unlike the single-list get_top_* scans over every coin.
+        """
+        return _parse_tops(self._scan(_tops_payload(universe)), n)
+
+
+class AsyncTradingView:
+    _path = '/coin/scan'
+
+    async def __aenter__(self) -> Self:
+        self._client = AsyncClient(
+            base_url='https://scanner.tradingview.com', http2=True, event_hooks=rate_limit.async_httpx_hooks
         )
-        resp = self._client.post(self._path, json=payload)
-        data = resp.json()
-        data = [{'symbol': d['d'][0], 'volume': d['d'][1]} for d in data['data']]
-        return [TopVolume(**d) for d in data]
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self._client.aclose()
+
+    async def _scan(self, payload: dict) -> list[list]:
+        resp = await self._client.post(self._path, json=payload)
+        return _rows(resp.json())
+
+    async def get_top_gainers(self) -> list[TopGainer]:
+        return [TopGainer(symbol=d[0], change=d[1]) for d in await self._scan(_gainers_payload)]
+
+    async def get_top_lossers(self) -> list[TopLosser]:
+        return [TopLosser(symbol=d[0], change=d[1]) for d in await self._scan(_lossers_payload)]
+
+    async def get_top_transactions(self) -> list[TopTransaction]:
+        return [TopTransaction(symbol=d[0], transaction=d[1]) for d in await self._scan(_transactions_payload)]
+
+    async def get_top_volumes(self) -> list[TopVolume]:
+        return [TopVolume(symbol=d[0], volume=d[1]) for d in await self._scan(_volumes_payload)]
+
+    async def get_tops(self, n: int = 20, universe: int = 1000) -> Tops:
+        """Rank the `universe` coins with the highest 24h volume, see TradingView.get_tops."""
+        return _parse_tops(await self._scan(_tops_payload(universe)), n)
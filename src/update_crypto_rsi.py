@@ -6,10 +6,7 @@ from datetime import datetime
 from io import BytesIO
 from zoneinfo import ZoneInfo
 
-import pandas as pd
-import seaborn as sns
 from loguru import logger
-from matplotlib import pyplot as plt
 
 from clients import CoinMarketCapClient
 from telegram import Telegram
@@ -20,15 +17,16 @@ def main() -> None:
     with CoinMarketCapClient() as client:
         overall = client.fetch_overral_rsi()
 
-    logger.info(f'Overall RSI: {overall}')
-    if 30 < overall.average_rsi < 70:
-        logger.info('RSI is neutral, no need to send report.')
-        return
+        logger.info(f'Overall RSI: {overall}')
+        if 30 < overall.average_rsi < 70:
+            logger.info('RSI is neutral, no need to send report.')
+            return
 
-    with CoinMarketCapClient() as client:
-        data = client.fetch_rsi()
+        df = client.fetch_rsi_df()
 
-    df = pd.DataFrame([row.model_dump() for row in data])
+    # Plotting libraries are slow to import and not needed when RSI is neutral
+    import seaborn as sns
+    from matplotlib import pyplot as plt
 
     sns.set_style('whitegrid')
     fig, axes = plt.subplots(2, figsize=(15, 10))
@@ -77,6 +75,7 @@ def main() -> None:
 
     with BytesIO() as img, Telegram() as tele:
         fig.savefig(img, format='jpg')
+        plt.close(fig)
         img.seek(0)
         tele.send_photo(img.read(), caption=caption, parse_mode='HTML')
 
@@ -4,17 +4,16 @@ __email__ = 'doankhiem.crazy@gmail.com'
 
 from datetime import datetime, timedelta
 from io import BytesIO
-from typing import Self
 
 import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
-from fake_useragent import UserAgent
-from httpx import Client, Request
 from loguru import logger
 from matplotlib.dates import DateFormatter
 from pydantic import BaseModel, Field
 
+from clients.base import BaseClient
+from clients.response_cache import floor_time
 from telegram import Telegram
 from templates import Render
 
@@ -63,36 +62,19 @@ class FgiResponse(BaseModel):
     data: Data
 
 
-class FgiClient:
-    def __init__(self) -> None:
-        self._ua = UserAgent()
-
-    def __enter__(self) -> Self:
-        self._client = Client(
-            base_url='https://api.coinmarketcap.com',
-            http2=True,
-            event_hooks={
-                'request': [self._random_user_agent],
-            },
-        )
-        return self
-
-    def __exit__(self, exc_type, exc_value, traceback) -> None:
-        self._client.close()
-
-    def _random_user_agent(self, request: Request) -> None:
-        request.headers['User-Agent'] = self._ua.random
+class FgiClient(BaseClient):
+    base_url = 'https://api.coinmarketcap.com'
 
     def get(self) -> list[Fgi]:
-        end = datetime.now()
+        # Daily values, the same hourly window is served from the cache
+        end = floor_time(3600)
         start = end - timedelta(days=30)
         params = {
             'start': int(start.timestamp()),
             'end': int(end.timestamp()),
         }
-        resp = self._client.get('/data-api/v3/fear-greed/chart', params=params)
-        if not resp.is_success:
-            resp.raise_for_status()
+        resp = self._request('GET', '/data-api/v3/fear-greed/chart', ttl=3600, params=params)
+        resp.raise_for_status()
 
         status_resp = StatusResponse.model_validate_json(resp.content)
         if status_resp.status.error_code != 0:
@@ -102,7 +84,7 @@ class FgiClient:
         return fgi_resp.data.dataList
 
 
-if __name__ == '__main__':
+def main() -> None:
     logger.info('Start collect data')
 
     with FgiClient() as client:
@@ -117,7 +99,8 @@ if __name__ == '__main__':
 
     sns.set_theme(style='darkgrid')
 
-    ax = sns.lineplot(data=df, x='timestamp', y='score')
+    fig, ax = plt.subplots()
+    sns.lineplot(data=df, x='timestamp', y='score', ax=ax)
     ax.set_title(f'Date: {time:%d/%m/%Y}', fontsize=10, loc='right')
 
     ax.text(time + timedelta(days=1), value, f'{value}', va='center')
@@ -126,11 +109,12 @@ if __name__ == '__main__':
     ax.tick_params(axis='x', labelrotation=25)
     ax.xaxis.set_major_formatter(DateFormatter('%d/%m'))
 
-    plt.suptitle('Fear & Greed Index')
-    plt.tight_layout()
+    fig.suptitle('Fear & Greed Index')
+    fig.tight_layout()
 
     with BytesIO() as img, Telegram() as tele:
-        plt.savefig(img, dpi=400, format='jpg')
+        fig.savefig(img, dpi=400, format='jpg')
+        plt.close(fig)
         img.seek(0)
 
         render = Render()
@@ -138,3 +122,7 @@ if __name__ == '__main__':
         logger.info(caption)
 
         tele.send_photo(img, caption, parse_mode='HTML')
+
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,8 @@ from clients import BybitClient
 from telegram import Telegram
 from templates import Render
 
-if __name__ == '__main__':
+
+def main() -> None:
     logger.info('Start updating launchpool')
 
     with BybitClient() as client:
@@ -23,3 +24,7 @@ if __name__ == '__main__':
     with Telegram() as tele:
         resp = tele.send_message(text)
         print(resp)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,36 +4,22 @@ __email__ = 'doankhiem.crazy@gmail.com'
 
 from datetime import datetime
 from io import BytesIO
-from pathlib import Path
 
 import httpx
-import pandas as pd
 import seaborn as sns
 from loguru import logger
-from matplotlib import dates
+from matplotlib import dates, ticker
 from matplotlib import pyplot as plt
-from matplotlib import ticker
-from pandas.errors import EmptyDataError
 
+from storage import open_p2p_store
 from telegram import Telegram
 from templates import Render
 
 
-def load_data(file: Path) -> pd.DataFrame:
-    try:
-        return pd.read_csv(file)
-    except (FileNotFoundError, EmptyDataError):
-        return pd.DataFrame(columns=['time', 'price']).astype({'time': 'datetime64[s]', 'price': 'int64'})
-
-
-if __name__ == '__main__':
+def main() -> None:
     now = datetime.now()
 
-    data_dir = Path('data')
-    data_dir.mkdir(parents=True, exist_ok=True)
-    data_file = data_dir / 'p2p.csv'
-
-    df = load_data(data_file)
+    store = open_p2p_store()
 
     url = 'https://p2p.binance.com/bapi/c2c/v2/friendly/c2c/adv/search'
     payload = {
@@ -57,28 +43,24 @@ if __name__ == '__main__':
     data = resp.json()['data']
     price = data[1]['adv']['price']
 
-    row = pd.DataFrame({'time': [now], 'price': [price]})
-    df = pd.concat([df, row], ignore_index=True)
-    df = df.astype({'time': 'datetime64[s]', 'price': 'int64'})
-    df.reset_index()
+    store.append({'time': now, 'price': price})
 
-    df.to_csv(data_file, index=False)
-
-    df = df.iloc[-7 * 24 :]
+    df = store.tail(7 * 24)
 
     sns.set_style('whitegrid')
 
-    fig = plt.figure(figsize=(10, 10))
-    sns.lineplot(df, x='time', y='price')
-    plt.ylabel('Price (VND)')
-    plt.gca().xaxis.get_label().set_visible(False)
+    fig, ax = plt.subplots(figsize=(10, 10))
+    sns.lineplot(df, x='time', y='price', ax=ax)
+    ax.set_ylabel('Price (VND)')
+    ax.xaxis.get_label().set_visible(False)
 
-    plt.xticks(rotation=45)
-    plt.gca().xaxis.set_major_formatter(dates.DateFormatter('%Y-%m-%d'))
-    plt.gca().xaxis.set_major_locator(ticker.MaxNLocator(7))
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.xaxis.set_major_formatter(dates.DateFormatter('%Y-%m-%d'))
+    ax.xaxis.set_major_locator(ticker.MaxNLocator(7))
 
     with BytesIO() as img, Telegram() as tele:
         fig.savefig(img, format='jpg')
+        plt.close(fig)
         img.seek(0)
 
         render = Render()
@@ -86,3 +68,7 @@ if __name__ == '__main__':
         logger.info(caption)
 
         tele.send_photo(img, caption, parse_mode='HTML')
+
+
+if __name__ == '__main__':
+    main()
@@ -2,13 +2,16 @@ __author__ = 'Khiem Doan'
 __github__ = 'https://github.com/khiemdoan'
 __email__ = 'doankhiem.crazy@gmail.com'
 
+from collections.abc import Callable
 from datetime import datetime
 from math import floor, log
+from typing import Any
 from zoneinfo import ZoneInfo
 
 import pandas as pd
 from loguru import logger
 from prettytable import PrettyTable
+from pydantic import BaseModel
 
 from telegram import Telegram
 from templates import Render
@@ -32,50 +35,50 @@ def _format_volume(number) -> str:
     return f'{(number / k**magnitude):.2f}{units[magnitude]}'
 
 
-if __name__ == '__main__':
+def _queue_top(
+    tele: Telegram,
+    render: Render,
+    now: datetime,
+    universe: int,
+    title: str,
+    fields: list[str],
+    formatter: Callable[[Any], str] | None,
+    data: list[BaseModel],
+) -> None:
+    df = pd.DataFrame([d.model_dump() for d in data])
+    df = df[~df['symbol'].str.contains('USD')]
+    if formatter is not None:
+        column = df.columns[1]
+        df[column] = df[column].apply(formatter)
+    symbols = df['symbol'].to_list()
+    table = _craft_table(fields, df)
+    message = render(
+        'top.j2', context={'title': title, 'universe': universe, 'time': now, 'symbols': symbols, 'table': table}
+    )
+    tele.queue_message(message, parse_mode='HTML')
+
+
+def main() -> None:
     logger.info('Start collect data')
 
     now = datetime.now(tz=ZoneInfo('Asia/Ho_Chi_Minh'))
 
+    # Every list is ranked among the coins with the highest 24h volume, the messages say so
+    universe = 1000
     render = Render()
     with TradingView() as client, Telegram() as tele:
-        # Top gainers
-        data = client.get_top_gainers()
-        df = pd.DataFrame([d.model_dump() for d in data])
-        df = df[~df['symbol'].str.contains('USD')]
-        df['change'] = df['change'].apply(lambda x: f'{x:.2f}%')
-        symbols = df['symbol'].to_list()
-        table = _craft_table(['Symbol', 'Change'], df)
-        message = render('top.j2', context={'title': 'Top gainers', 'time': now, 'symbols': symbols, 'table': table})
-        tele.send_message(message, parse_mode='HTML')
-
-        # Top losers
-        data = client.get_top_lossers()
-        df = pd.DataFrame([d.model_dump() for d in data])
-        df = df[~df['symbol'].str.contains('USD')]
-        df['change'] = df['change'].apply(lambda x: f'{x:.2f}%')
-        symbols = df['symbol'].to_list()
-        table = _craft_table(['Symbol', 'Change'], df)
-        message = render('top.j2', context={'title': 'Top lossers', 'time': now, 'symbols': symbols, 'table': table})
-        tele.send_message(message, parse_mode='HTML')
-
-        # Top tradings
-        data = client.get_top_transactions()
-        df = pd.DataFrame([d.model_dump() for d in data])
-        df = df[~df['symbol'].str.contains('USD')]
-        symbols = df['symbol'].to_list()
-        table = _craft_table(['Symbol', 'Transaction'], df)
-        message = render(
-            'top.j2', context={'title': 'Top transaction', 'time': now, 'symbols': symbols, 'table': table}
-        )
-        tele.send_message(message, parse_mode='HTML')
-
-        # Top volumes
-        data = client.get_top_volumes()
-        df = pd.DataFrame([d.model_dump() for d in data])
-        df = df[~df['symbol'].str.contains('USD')]
-        df['volume'] = df['volume'].apply(_format_volume)
-        symbols = df['symbol'].to_list()
-        table = _craft_table(['Symbol', 'Volume'], df)
-        message = render('top.j2', context={'title': 'Top volumes', 'time': now, 'symbols': symbols, 'table': table})
-        tele.send_message(message, parse_mode='HTML')
+        tops = [
+            ('gainers', 'Top gainers', ['Symbol', 'Change'], lambda x: f'{x:.2f}%'),
+            ('lossers', 'Top lossers', ['Symbol', 'Change'], lambda x: f'{x:.2f}%'),
+            ('transactions', 'Top transaction', ['Symbol', 'Transaction'], None),
+            ('volumes', 'Top volumes', ['Symbol', 'Volume'], _format_volume),
+        ]
+
+        # One scan serves every list, the messages are queued in order and sent when the Telegram context exits
+        data = client.get_tops(universe=universe)
+        for name, title, fields, formatter in tops:
+            _queue_top(tele, render, now, universe, title, fields, formatter, getattr(data, name))
+
+
+if __name__ == '__main__':
+    main()
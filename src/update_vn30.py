@@ -7,7 +7,8 @@ from graph import draw_klines
 from telegram import Telegram
 from templates import Render
 
-if __name__ == '__main__':
+
+def main() -> None:
     with VciClient() as client:
         df = client.get_vn30()
 
@@ -30,3 +31,7 @@ if __name__ == '__main__':
 
     with Telegram() as tele:
         tele.send_photo(img, caption=caption)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import pandas as pd
+import pytest
+
+from clients.binance import BinanceClient, _decode_klines, _max_limit, _parse_klines
+from constants import Interval
+
+raw_klines = [
+    [
+        1700000000000,
+        '36500.10',
+        '36600.00',
+        '36400.50',
+        '36550.00',
+        '120.5',
+        1700003599999,
+        '4400000.1',
+        1500,
+        '60.2',
+        '2200000.0',
+        '0',
+    ],
+    [
+        1700003600000,
+        '36550.00',
+        '36700.00',
+        '36500.00',
+        '36520.25',
+        '98.1',
+        1700007199999,
+        '3580000.9',
+        1200,
+        '40.0',
+        '1460000.5',
+        '0',
+    ],
+]
+
+
+def test_decode_klines_matches_parse() -> None:
+    df = _decode_klines(raw_klines)
+    klines = _parse_klines(raw_klines)
+
+    assert len(df) == len(klines.root)
+    for row, kline in zip(df.itertuples(index=False), klines.root, strict=True):
+        assert int(row.open_time.timestamp() * 1000) == kline.open_time
+        assert int(row.close_time.timestamp() * 1000) == kline.close_time
+        assert row.open == kline.open
+        assert row.close == kline.close
+        assert row.volume == kline.volume
+        assert row.number_of_trades == kline.number_of_trades
+
+
+def test_decode_empty_klines() -> None:
+    df = _decode_klines([])
+    assert df.empty
+    assert 'open_time' in df.columns
+
+
+hour = 60 * 60 * 1000
+
+
+class KlinesApi:
+    # Hourly candles up to the current, still open one, served like /api/v3/klines
+    def __init__(self, hours: int) -> None:
+        now = int(time.time() * 1000)
+        self.start = now - now % hour - (hours - 1) * hour
+        self.opens = list(range(self.start, now + 1, hour))
+        self.requests: list[dict] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        params = {k: int(v) for k, v in request.url.params.items() if k != 'symbol' and k != 'interval'}
+        self.requests.append(params)
+        start, end = params.get('startTime', 0), params.get('endTime', 2**62)
+        opens = [t for t in self.opens if start <= t <= end][: params['limit']]
+        rows = [[t, '1.0', '2.0', '0.5', '1.5', '10', t + hour - 1, '15', 3, '5', '7.5', '0'] for t in opens]
+        return httpx.Response(200, json=rows)
+
+
+def _client(api: KlinesApi) -> BinanceClient:
+    client = BinanceClient().__enter__()
+    client._client = httpx.Client(base_url='https://api.binance.com', transport=httpx.MockTransport(api))
+    return client
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_klines_range_pages(stream: bool) -> None:
+    api = KlinesApi(2 * _max_limit + 10)
+    df = _client(api).get_klines_range('BTCUSDT', Interval.H1, api.start, api.opens[-1] + hour, stream)
+
+    assert len(df) == len(api.opens)
+    assert df['open_time'].is_monotonic_increasing and df['open_time'].is_unique
+    # Each page starts right after the close of the previous one, the short third page ends the loop
+    assert [r['startTime'] for r in api.requests] == [api.start, api.opens[1000], api.opens[2000]]
+    assert df['number_of_trades'].dtype == 'int64' and df['close'].dtype == 'float64'
+
+
+def test_backfill_resumes_from_parquet(tmp_path: Path) -> None:
+    api = KlinesApi(1500)
+    start = datetime.fromtimestamp(api.start / 1000)
+    cache_file = tmp_path / 'BTCUSDT_1h.parquet'
+    _decode_klines(api(httpx.Request('GET', '/', params={'limit': 300})).json()).to_parquet(cache_file, index=False)
+    api.requests.clear()
+
+    df = _client(api).backfill_klines('BTCUSDT', Interval.H1, start, tmp_path)
+
+    assert [r['startTime'] for r in api.requests] == [api.opens[300], api.opens[1300]]
+    # The candle that is still open is not stored
+    assert df['open_time'].astype('int64').tolist() == api.opens[:-1]
+    pd.testing.assert_frame_equal(pd.read_parquet(cache_file), df)
+
+    api.requests.clear()
+    again = _client(api).backfill_klines('BTCUSDT', Interval.H1, start, tmp_path)
+    assert [r['startTime'] for r in api.requests] == [api.opens[-1]]
+    pd.testing.assert_frame_equal(again, df)
@@ -2,7 +2,42 @@ __author__ = 'Khiem Doan'
 __github__ = 'https://github.com/khiemdoan'
 __email__ = 'doankhiem.crazy@gmail.com'
 
+import json
+
 from clients import CoinMarketCapClient
+from clients.coinmarketcap import Rsi, _decode_rsi_df
+
+rsi_table = {
+    'data': {
+        'data': [
+            {
+                'id': '1',
+                'rank': 1,
+                'symbol': 'BTC',
+                'name': 'Bitcoin',
+                'slug': 'bitcoin',
+                'marketCap': 1.3e12,
+                'volume24h': 3.1e10,
+                'price': 65000,
+                'price24h': 64000.5,
+                'rsi': {'rsi15m': 55.1, 'rsi1h': 60, 'rsi4h': 48.7, 'rsi24h': 51.2, 'rsi7d': 45.0},
+            },
+            {
+                'id': '1027',
+                'rank': 2,
+                'symbol': 'ETH',
+                'name': 'Ethereum',
+                'slug': 'ethereum',
+                'marketCap': 4.1e11,
+                'volume24h': 1.5e10,
+                'price': 3400.25,
+                'price24h': 3350,
+                'rsi': {'rsi15m': 30.5, 'rsi1h': 28.4, 'rsi4h': 35, 'rsi24h': 40.1, 'rsi7d': 62.3},
+            },
+        ]
+    },
+    'status': {'error_code': '0'},
+}
 
 
 def test_rsi_overall() -> None:
@@ -23,3 +58,22 @@ def test_rsi_item() -> None:
             assert item.rsi4h is not None
             assert item.rsi24h is not None
             assert item.rsi7d is not None
+
+
+def test_decode_rsi_df() -> None:
+    df = _decode_rsi_df(json.dumps(rsi_table).encode())
+
+    # The nested rsi values are lifted into columns next to the item fields
+    assert df.columns.tolist() == list(Rsi.model_fields)
+    assert df['symbol'].tolist() == ['BTC', 'ETH']
+    assert df['rsi1h'].tolist() == [60.0, 28.4]
+    assert df['rsi4h'].tolist() == [48.7, 35.0]
+    assert df['rank'].dtype == 'int64'
+    for name in ['marketCap', 'volume24h', 'price', 'price24h', 'rsi15m', 'rsi1h', 'rsi4h', 'rsi24h', 'rsi7d']:
+        assert df[name].dtype == 'float64'
+
+
+def test_decode_empty_rsi_df() -> None:
+    df = _decode_rsi_df(b'{"data": {"data": []}}')
+    assert df.empty
+    assert df.columns.tolist() == list(Rsi.model_fields)
@@ -0,0 +1,34 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import math
+
+import pytest
+
+from clients.ohlc import payload_to_klines
+from constants import TRUSTED_KLINES
+
+payload = {
+    't': [1700000000, 1700086400],
+    'o': [70.5, 71.0],
+    'h': [71.2, 71.5],
+    'l': [70.1, 70.8],
+    'c': [71.0, 71.3],
+    'v': [1_200_000, 980_000],
+}
+
+
+def test_payload_to_klines() -> None:
+    df = payload_to_klines(payload)
+
+    assert df['open_time'].dtype == 'datetime64[s]'
+    assert df['volume'].dtype == 'float64'
+    assert df['close'].to_list() == [71.0, 71.3]
+    assert df.attrs[TRUSTED_KLINES] is True
+
+
+@pytest.mark.parametrize('value', [math.nan, -1.0])
+def test_invalid_values_are_not_trusted(value: float) -> None:
+    df = payload_to_klines({**payload, 'l': [70.1, value]})
+    assert df.attrs[TRUSTED_KLINES] is False
@@ -0,0 +1,77 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler
+
+import httpx
+import pytest
+from conftest import Clock
+from niquests import Session
+
+from clients import rate_limit
+from clients.rate_limit import TokenBucket
+
+
+def test_burst_then_rate(clock: Clock) -> None:
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+
+    assert [bucket._reserve(1) for _ in range(3)] == [0, 0, 0]
+    assert bucket._reserve(1) == pytest.approx(0.5)
+    assert bucket._reserve(1) == pytest.approx(1.0)
+
+    clock.now = 10
+    assert bucket._reserve(1) == 0
+
+
+def test_pause(clock: Clock) -> None:
+    bucket = TokenBucket(rate=10, capacity=10, clock=clock)
+
+    bucket.pause(5)
+    assert bucket._reserve(1) == pytest.approx(5)
+
+    clock.now = 5
+    assert bucket._reserve(1) == 0
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path == '/throttled':
+            self.send_response(429)
+            self.send_header('Retry-After', '30')
+        elif self.path == '/weight':
+            self.send_response(200)
+            self.send_header('X-MBX-USED-WEIGHT-1M', '5999')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+@pytest.fixture
+def handler() -> Iterator[type[BaseHTTPRequestHandler]]:
+    rate_limit._buckets.clear()
+    yield Handler
+    rate_limit._buckets.clear()
+
+
+def _paused_for(host: str) -> float:
+    bucket = rate_limit.get_bucket(host)
+    return bucket._paused_until - bucket._clock()
+
+
+def test_session_honors_retry_after(server: str) -> None:
+    hooks = {'pre_request': [rate_limit.before_request], 'response': [rate_limit.after_response]}
+    with Session(base_url=server, hooks=hooks) as session:
+        assert session.get('/ok').status_code == 200
+        assert _paused_for('127.0.0.1') <= 0
+
+        assert session.get('/throttled').status_code == 429
+        assert 29 < _paused_for('127.0.0.1') <= 30
+
+
+def test_httpx_honors_used_weight(server: str) -> None:
+    with httpx.Client(base_url=server, event_hooks=rate_limit.httpx_hooks) as client:
+        assert client.get('/weight').status_code == 200
+        assert 0 < _paused_for('127.0.0.1') <= 60
@@ -0,0 +1,133 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import asyncio
+import socket
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+from conftest import Clock
+from niquests import AsyncSession
+from niquests.packages.urllib3.contrib.resolver import BaseResolver, ProtocolResolver
+from niquests.packages.urllib3.contrib.resolver._async import AsyncBaseResolver
+
+from clients.resolver import AsyncCachedResolver, CachedResolver, DnsCache
+
+
+class Records(list):
+    ttl: int
+
+
+class StubResolver(BaseResolver):
+    protocol = ProtocolResolver.CUSTOM
+    implementation = 'stub'
+
+    def __init__(self, ttl: int) -> None:
+        super().__init__(None, None)
+        self.ttl = ttl
+        self.calls = 0
+
+    def close(self) -> None:
+        return
+
+    def is_available(self) -> bool:
+        return True
+
+    def getaddrinfo(self, host, port, family, type, proto=0, flags=0, *, quic_upgrade_via_dns_rr=False):
+        self.calls += 1
+        records = Records([(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', port or 0))])
+        records.ttl = self.ttl
+        return records
+
+
+class AsyncStubResolver(AsyncBaseResolver):
+    protocol = ProtocolResolver.CUSTOM
+    implementation = 'stub'
+
+    def __init__(self) -> None:
+        super().__init__(None, None)
+        self.calls = 0
+
+    async def close(self) -> None:
+        return
+
+    def is_available(self) -> bool:
+        return True
+
+    async def getaddrinfo(self, host, port, family, type, proto=0, flags=0, *, quic_upgrade_via_dns_rr=False):
+        self.calls += 1
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port or 0))]
+
+
+def test_cache_honors_ttl(clock: Clock) -> None:
+    stub = StubResolver(ttl=60)
+    resolver = CachedResolver(stub, DnsCache(clock))
+
+    records = resolver.getaddrinfo('api.example.com', 443, socket.AF_INET, socket.SOCK_STREAM)
+    assert records[0][4] == ('10.0.0.1', 443)
+
+    records = resolver.getaddrinfo('API.example.com', 80, socket.AF_INET, socket.SOCK_STREAM)
+    assert records[0][4] == ('10.0.0.1', 80)
+    assert stub.calls == 1
+
+    clock.now += 61
+    resolver.getaddrinfo('api.example.com', 443, socket.AF_INET, socket.SOCK_STREAM)
+    assert stub.calls == 2
+
+
+def test_zero_ttl_is_not_cached(clock: Clock) -> None:
+    stub = StubResolver(ttl=0)
+    resolver = CachedResolver(stub, DnsCache(clock))
+
+    resolver.getaddrinfo('api.example.com', 443, socket.AF_INET, socket.SOCK_STREAM)
+    resolver.getaddrinfo('api.example.com', 443, socket.AF_INET, socket.SOCK_STREAM)
+    assert stub.calls == 2
+
+
+def test_warm_cache_file(tmp_path: Path, clock: Clock) -> None:
+    cache = DnsCache(clock)
+    CachedResolver(StubResolver(ttl=60), cache).getaddrinfo('api.example.com', 443, socket.AF_INET, socket.SOCK_STREAM)
+    cache.save(tmp_path / 'dns.json')
+
+    stub = StubResolver(ttl=60)
+    warm = DnsCache(clock)
+    warm.load(tmp_path / 'dns.json')
+    records = CachedResolver(stub, warm).getaddrinfo('api.example.com', 8443, socket.AF_INET, socket.SOCK_STREAM)
+    assert records[0][4] == ('10.0.0.1', 8443)
+    assert stub.calls == 0
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+@pytest.fixture
+def handler() -> type[BaseHTTPRequestHandler]:
+    return Handler
+
+
+def test_async_session_shares_cache(server: str, clock: Clock) -> None:
+    port = urlsplit(server).port
+    cache = DnsCache(clock)
+    CachedResolver(StubResolver(ttl=60), cache).getaddrinfo('warm.example', 443, socket.AF_INET, socket.SOCK_STREAM)
+
+    async def fetch(host: str, stub: AsyncStubResolver) -> int:
+        async with AsyncSession(resolver=AsyncCachedResolver(stub, cache)) as session:
+            resp = await session.get(f'http://{host}:{port}/')
+            return resp.status_code
+
+    stub = AsyncStubResolver()
+    assert asyncio.run(fetch('api.example', stub)) == 200
+    assert stub.calls > 0
+
+    # Entries resolved by a sync session are reused by async ones
+    records = asyncio.run(
+        AsyncCachedResolver(stub, cache).getaddrinfo('warm.example', 80, socket.AF_INET, socket.SOCK_STREAM)
+    )
+    assert records[0][4] == ('10.0.0.1', 80)
@@ -0,0 +1,114 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+from conftest import Clock
+from niquests import Session
+
+from clients.response_cache import ResponseCache
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests: list[str | None] = []
+
+    def do_GET(self) -> None:
+        etag = self.headers.get('If-None-Match')
+        self.requests.append(etag)
+        if etag == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = b'{"value": 1}'
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def handler() -> type[BaseHTTPRequestHandler]:
+    Handler.requests = []
+    return Handler
+
+
+@pytest.fixture
+def session(server: str) -> Iterator[Session]:
+    with Session(base_url=server) as session:
+        yield session
+
+
+def test_fresh_entry_is_reused(session: Session, clock: Clock) -> None:
+    cache = ResponseCache(clock=clock)
+
+    first = cache.fetch(session.request, 'GET', '/data', ttl=60, params={'a': 1})
+    second = cache.fetch(session.request, 'GET', '/data', ttl=60, params={'a': 1})
+
+    assert first.json() == second.json() == {'value': 1}
+    assert Handler.requests == [None]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.fetch(session.request, 'GET', '/data', ttl=60, params={'a': 2})
+    assert Handler.requests == [None, None]
+
+
+def test_stale_entry_is_revalidated(session: Session, clock: Clock) -> None:
+    cache = ResponseCache(clock=clock)
+
+    cache.fetch(session.request, 'GET', '/data', ttl=60)
+    clock.now = 61
+    resp = cache.fetch(session.request, 'GET', '/data', ttl=60)
+
+    assert resp.status_code == 200
+    assert resp.json() == {'value': 1}
+    assert Handler.requests == [None, '"v1"']
+    assert cache.revalidations == 1
+
+    cache.fetch(session.request, 'GET', '/data', ttl=60)
+    assert cache.hits == 1
+
+
+def test_disk_cache(session: Session, tmp_path: Path, clock: Clock) -> None:
+    ResponseCache(tmp_path, clock=clock).fetch(session.request, 'GET', '/data', ttl=60)
+
+    cache = ResponseCache(tmp_path, clock=clock)
+    resp = cache.fetch(session.request, 'GET', '/data', ttl=60)
+
+    assert resp.json() == {'value': 1}
+    assert resp.headers['ETag'] == '"v1"'
+    assert Handler.requests == [None]
+    assert cache.hits == 1
+
+
+def test_request_headers_split_entries(session: Session, clock: Clock) -> None:
+    cache = ResponseCache(clock=clock)
+
+    cache.fetch(session.request, 'GET', '/data', ttl=60, headers={'Referer': 'https://a.example'})
+    cache.fetch(session.request, 'GET', '/data', ttl=60, headers={'referer': 'https://a.example'})
+    cache.fetch(session.request, 'GET', '/data', ttl=60, headers={'Referer': 'https://b.example'})
+
+    assert Handler.requests == [None, None]
+    assert cache.hits == 1
+
+
+def test_prune(session: Session, tmp_path: Path, clock: Clock) -> None:
+    cache = ResponseCache(tmp_path, clock=clock)
+    cache.fetch(session.request, 'GET', '/old', ttl=60)
+    clock.now = 100
+    cache.fetch(session.request, 'GET', '/new', ttl=60)
+
+    # /old expired at 60, /new at 160
+    clock.now = 150
+    assert cache.prune(max_stale=100) == 0
+    assert cache.prune(max_stale=60) == 1
+    assert len(list(tmp_path.iterdir())) == 2
+
+    cache.fetch(session.request, 'GET', '/old', ttl=60)
+    assert Handler.requests == [None, None, None]
@@ -0,0 +1,93 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import asyncio
+import json
+
+import pytest
+
+from clients.streaming import ColumnBuffer, JsonArraySplitter, aiter_json_array, iter_json_array
+
+data = [
+    {'symbol': 'VNM', 't': [1700000000, 1700086400], 'c': [70.5, -1e-3], 'name': 'Vinamilk – sữa'},
+    [12345, '36500.10', True, None],
+    -0.25,
+    'plain',
+    [],
+    {},
+]
+raw = json.dumps(data, ensure_ascii=False).encode()
+
+
+def _chunks(body: bytes, size: int) -> list[bytes]:
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, len(raw)])
+def test_split_at_any_chunk_size(size: int) -> None:
+    assert list(iter_json_array(_chunks(raw, size))) == data
+
+
+def test_split_at_every_position() -> None:
+    # Numbers cut at the end of a chunk and multi-byte characters cut in half are completed by the next chunk
+    for i in range(len(raw) + 1):
+        assert list(iter_json_array([raw[:i], raw[i:]])) == data
+
+
+def test_elements_arrive_before_the_end() -> None:
+    splitter = JsonArraySplitter()
+    assert splitter.feed(b' [ {"a": 1}, 2') == [{'a': 1}]
+    assert splitter.feed(b'5, 3') == [25]
+    assert splitter.feed(b'] \n') == [3]
+    assert splitter.close() == []
+
+
+def test_empty_array() -> None:
+    assert list(iter_json_array([b' [ ', b'] '])) == []
+
+
+@pytest.mark.parametrize('body', [b'{"a": 1}', b'[1, 2', b'[1 2]', b'[1,]', b'[1] 2', b''])
+def test_invalid(body: bytes) -> None:
+    with pytest.raises(ValueError):
+        list(iter_json_array(_chunks(body, 2)))
+
+
+def test_async() -> None:
+    async def chunks():
+        for chunk in _chunks(raw, 5):
+            yield chunk
+
+    async def collect() -> list:
+        return [item async for item in aiter_json_array(chunks())]
+
+    assert asyncio.run(collect()) == data
+
+
+def test_column_buffer() -> None:
+    columns = ColumnBuffer({'time': int, 'close': float})
+    assert len(columns) == 0
+
+    columns.append([1700000000000, '36500.10'])
+    columns.append([1700003600000, 36550])
+
+    assert len(columns) == 2
+    assert columns.last('time') == 1700003600000
+    arrays = columns.to_arrays()
+    assert arrays['time'].dtype == 'int64'
+    assert arrays['close'].tolist() == [36500.1, 36550.0]
+
+    with pytest.raises(ValueError):
+        columns.append([1])
+
+
+def test_column_buffer_batches() -> None:
+    columns = ColumnBuffer({'time': int, 'close': float}, batch_size=2)
+    for i in range(5):
+        columns.append([i, f'{i}.5'])
+        assert columns.last('time') == i
+
+    arrays = columns.to_arrays()
+    assert arrays['time'].tolist() == [0, 1, 2, 3, 4]
+    assert arrays['close'].tolist() == [0.5, 1.5, 2.5, 3.5, 4.5]
+    assert ColumnBuffer({'time': int}).to_arrays()['time'].dtype == 'int64'
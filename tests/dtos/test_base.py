@@ -0,0 +1,58 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+from datetime import UTC, datetime
+
+from dtos.base import Base, NormalizedDecimal, UtcDatetime
+from dtos.bybit import Launchpool
+
+payload = {
+    'returnCoin': 'NEW',
+    'desc': 'Stake BNB to earn NEW',
+    'totalPoolAmount': '1000000',
+    'stakeBeginTime': 1_700_000_000_000,
+    'stakeEndTime': '2023-11-21T22:13:20',
+    'stakePoolList': [
+        {
+            'stakeCoin': 'USDT',
+            'apr': '12.5',
+            'aprVip': 20,
+            'stakeBeginTime': 1_700_000_000_000,
+            'stakeEndTime': 1_700_100_000_000,
+        }
+    ],
+}
+
+
+def test_camel_case_payload() -> None:
+    launchpool = Launchpool(**payload)
+
+    assert launchpool.return_coin == 'NEW'
+    assert launchpool.total_pool_amount == 1_000_000
+    assert launchpool.stake_begin_time == datetime(2023, 11, 14, 22, 13, 20, tzinfo=UTC)
+    assert launchpool.stake_end_time == datetime(2023, 11, 21, 22, 13, 20, tzinfo=UTC)
+
+    (pool,) = launchpool.stake_pool_list
+    assert (pool.stake_coin, pool.apr, pool.apr_vip) == ('USDT', 12.5, 20.0)
+    assert pool.stake_end_time.tzinfo is UTC
+
+
+def test_snake_case_names() -> None:
+    data = {**payload, 'return_coin': 'NEW'}
+    del data['returnCoin']
+    launchpool = Launchpool.model_validate(data)
+    assert launchpool.return_coin == 'NEW'
+
+
+class Price(Base):
+    last_price: NormalizedDecimal
+    updated_at: UtcDatetime | None = None
+
+
+def test_decimal_is_normalized() -> None:
+    price = Price(lastPrice='25000.1000', updatedAt='2024-01-01T07:00:00')
+
+    assert str(price.last_price) == '25000.1'
+    assert price.updated_at == datetime(2024, 1, 1, 7, tzinfo=UTC)
+    assert Price(lastPrice='1.50').updated_at is None
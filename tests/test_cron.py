@@ -0,0 +1,57 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+from datetime import UTC, datetime
+
+import pytest
+
+from cron import Cron
+
+
+def test_parse_fields() -> None:
+    cron = Cron('*/15 1-3,5 * * 1-5')
+    assert cron.minutes == {0, 15, 30, 45}
+    assert cron.hours == {1, 2, 3, 5}
+    assert cron.weekdays == {1, 2, 3, 4, 5}
+
+
+@pytest.mark.parametrize('expression', ['* * * *', '60 * * * *', '5-1 * * * *', '*/0 * * * *'])
+def test_invalid_expression(expression: str) -> None:
+    with pytest.raises(ValueError):
+        Cron(expression)
+
+
+def test_next_hourly() -> None:
+    cron = Cron('0 * * * *')
+    now = datetime(2024, 1, 1, 10, 0, 30, tzinfo=UTC)
+    assert cron.next_after(now) == datetime(2024, 1, 1, 11, 0, tzinfo=UTC)
+
+
+def test_next_weekdays() -> None:
+    cron = Cron('0 1-10 * * 1-5')
+    # Friday 2024-01-05 10:00 is the last run of the week
+    assert cron.next_after(datetime(2024, 1, 5, 10, 0)) == datetime(2024, 1, 8, 1, 0)
+    assert cron.next_after(datetime(2024, 1, 8, 1, 0)) == datetime(2024, 1, 8, 2, 0)
+
+
+def test_sunday_as_seven() -> None:
+    cron = Cron('30 12 * * 7')
+    assert cron.next_after(datetime(2024, 1, 1)) == datetime(2024, 1, 7, 12, 30)
+
+
+def test_day_or_weekday() -> None:
+    # Restricted day of month and day of week match when either one does
+    cron = Cron('0 0 13 * 5')
+    assert cron.next_after(datetime(2024, 1, 1)) == datetime(2024, 1, 5)
+    assert cron.next_after(datetime(2024, 1, 12)) == datetime(2024, 1, 13)
+
+
+def test_next_month() -> None:
+    cron = Cron('0 0 31 * *')
+    assert cron.next_after(datetime(2024, 4, 1)) == datetime(2024, 5, 31)
+
+
+def test_never_matches() -> None:
+    with pytest.raises(ValueError):
+        Cron('0 0 31 2 *').next_after(datetime(2024, 1, 1))
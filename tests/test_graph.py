@@ -0,0 +1,36 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandera.errors import SchemaError
+
+from clients.ohlc import to_klines
+from graph import draw_klines, validate_klines
+
+
+def _klines(rows: int) -> pd.DataFrame:
+    close = 100 + np.arange(rows) % 7
+    time = np.arange(rows) * 3600 + 1700000000
+    return to_klines(time, close - 1, close + 2, close - 2, close, np.full(rows, 1000.0))
+
+
+def test_draw_klines_keeps_input() -> None:
+    df = _klines(80)
+    before = df.copy()
+
+    image = draw_klines(df, validation='trusted')
+
+    assert image[:2] == b'\xff\xd8'
+    pd.testing.assert_frame_equal(df, before)
+
+
+@pytest.mark.parametrize('validation', ['strict', 'trusted'])
+def test_derived_frame_is_checked(validation: str) -> None:
+    # The trusted flag is copied to derived frames, edited values must still be rejected
+    df = _klines(20)
+    edited = df.assign(low=df['low'] - 200)
+    with pytest.raises(SchemaError):
+        validate_klines(edited, validation)
@@ -0,0 +1,40 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from storage import AppendOnlyCsv
+
+dtypes = {'time': 'datetime64[s]', 'price': 'int64'}
+
+
+def _fill(store: AppendOnlyCsv, rows: int) -> None:
+    start = datetime(2024, 1, 1)
+    for i in range(rows):
+        store.append({'time': start + timedelta(hours=i), 'price': 25000 + i})
+
+
+def test_append_and_tail(tmp_path: Path) -> None:
+    store = AppendOnlyCsv(tmp_path / 'p2p.csv', dtypes)
+    store._block_size = 64
+    _fill(store, 100)
+
+    df = store.tail(10)
+    assert len(df) == 10
+    assert df['price'].to_list() == list(range(25090, 25100))
+    assert df['time'].dtype == 'datetime64[s]'
+    assert len(store.read()) == 100
+
+
+def test_compact(tmp_path: Path) -> None:
+    store = AppendOnlyCsv(tmp_path / 'p2p.csv', dtypes)
+    _fill(store, 50)
+    store.compact(keep=5)
+    store.append({'time': datetime(2024, 1, 3, 2), 'price': 25050})
+
+    assert (tmp_path / 'p2p.parquet').exists()
+    assert len(store.tail(20)) == 20
+    assert store.tail(20)['price'].to_list() == list(range(25031, 25051))
+    assert store.read()['price'].to_list() == list(range(25000, 25051))
@@ -0,0 +1,234 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import asyncio
+import json
+from email.parser import BytesParser
+from email.policy import default
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+import pytest
+from niquests import AsyncSession, HTTPError, Session
+from pydantic import ValidationError
+
+import telegram
+from telegram import AsyncTelegram, Telegram, TelegramSettings
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests: list[tuple[str, dict, dict]] = []
+    # Number of upcoming requests answered with flood control
+    flood = 0
+    failing_chats: set[str] = set()
+
+    def _form(self) -> tuple[dict, dict]:
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        content_type = self.headers['Content-Type']
+        if not content_type.startswith('multipart/form-data'):
+            return {k: v[0] for k, v in parse_qs(body.decode()).items()}, {}
+
+        message = BytesParser(policy=default).parsebytes(f'Content-Type: {content_type}\r\n\r\n'.encode() + body)
+        fields, files = {}, {}
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if part.get_filename() is None:
+                fields[name] = part.get_content()
+            else:
+                files[name] = part.get_payload(decode=True)
+        return fields, files
+
+    def do_POST(self) -> None:
+        method = self.path.rsplit('/', 1)[-1]
+        fields, files = self._form()
+        self.requests.append((method, fields, files))
+
+        if fields.get('chat_id') in self.failing_chats:
+            self._reply(400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: chat not found'})
+            return
+
+        if Handler.flood > 0:
+            Handler.flood -= 1
+            self._reply(429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 0.01}})
+            return
+
+        n = len(self.requests)
+        photo = [{'file_id': f'thumb-{n}'}, {'file_id': f'file-{n}'}]
+        if method == 'sendMediaGroup':
+            media = json.loads(fields['media'])
+            result = [{'photo': [{'file_id': f'file-{n}-{i}'}]} for i in range(len(media))]
+        elif method == 'sendPhoto':
+            result = {'message_id': n, 'photo': photo}
+        else:
+            result = {'message_id': n}
+        self._reply(200, {'ok': True, 'result': result})
+
+    def _reply(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def handler(monkeypatch: pytest.MonkeyPatch) -> type[BaseHTTPRequestHandler]:
+    monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'token')
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', '100')
+    monkeypatch.setenv('TELEGRAM_CHAT_RATE', '1000')
+    monkeypatch.setattr(telegram, '_chat_buckets', {})
+
+    Handler.requests = []
+    Handler.flood = 0
+    Handler.failing_chats = set()
+    return Handler
+
+
+def _telegram(server: str) -> Telegram:
+    tele = Telegram().__enter__()
+    tele._client = Session(base_url=server)
+    return tele
+
+
+def test_queue_groups_photos_into_albums(server: str) -> None:
+    tele = _telegram(server)
+    tele.queue_message('first')
+    for i in range(12):
+        tele.queue_photo(f'id-{i}', f'photo {i}')
+    tele.queue_photo('id-html', 'html photo', parse_mode='HTML')
+    tele.queue_message('last')
+    tele.__exit__(None, None, None)
+
+    methods = [method for method, _, _ in Handler.requests]
+    # 12 photos are split at 10, the remainder of 2 is still an album, a lone photo is sent on its own
+    assert methods == ['sendMessage', 'sendMediaGroup', 'sendMediaGroup', 'sendPhoto', 'sendMessage']
+    assert [len(json.loads(fields['media'])) for _, fields, _ in Handler.requests[1:3]] == [10, 2]
+    assert Handler.requests[3][1]['parse_mode'] == 'HTML'
+    assert Handler.requests[4][1]['text'] == 'last'
+    assert tele._queue == []
+
+
+def test_failed_send_keeps_queue(server: str) -> None:
+    tele = _telegram(server)
+    tele.queue_message('first')
+    tele.queue_message('second')
+    Handler.flood = telegram._max_attempts
+
+    with pytest.raises(HTTPError):
+        tele.flush()
+    assert [kwargs['text'] for _, kwargs in tele._queue] == ['first', 'second']
+
+    tele.flush()
+    assert [fields['text'] for _, fields, _ in Handler.requests[-2:]] == ['first', 'second']
+    assert tele._queue == []
+
+
+def test_error_in_block_drops_queue(server: str) -> None:
+    with pytest.raises(RuntimeError):
+        with Telegram() as tele:
+            tele._client = Session(base_url=server)
+            tele.queue_message('not sent')
+            raise RuntimeError
+    assert Handler.requests == []
+
+
+def test_flood_control_is_retried(server: str) -> None:
+    tele = _telegram(server)
+    Handler.flood = 2
+
+    result = tele.send_message('hello')
+
+    assert result['ok']
+    assert len(Handler.requests) == 3
+
+
+class Response:
+    def __init__(self, status_code: int, data) -> None:
+        self.status_code = status_code
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+@pytest.mark.parametrize(
+    ('status_code', 'data', 'expected'),
+    [
+        (200, {'ok': True}, None),
+        (429, {'ok': False, 'parameters': {'retry_after': 7}}, 7.0),
+        (429, {'ok': False}, 1.0),
+    ],
+)
+def test_retry_after(status_code: int, data: dict, expected: float | None) -> None:
+    assert telegram._retry_after(Response(status_code, data)) == expected
+
+
+def test_photo_is_uploaded_once(server: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', '100, 200')
+    tele = _telegram(server)
+
+    tele.send_photo(b'image', 'caption')
+
+    (_, first, first_files), (_, second, second_files) = Handler.requests
+    assert (first['chat_id'], first_files) == ('100', {'photo': b'image'})
+    assert (second['chat_id'], second['photo'], second_files) == ('200', 'file-1', {})
+
+
+def test_album_is_uploaded_once(server: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', '100,200')
+    tele = _telegram(server)
+
+    tele.send_media_group([(b'a', 'first'), (b'b', 'second')])
+
+    (_, first, first_files), (_, second, second_files) = Handler.requests
+    assert first_files == {'photo0': b'a', 'photo1': b'b'}
+    assert [m['media'] for m in json.loads(first['media'])] == ['attach://photo0', 'attach://photo1']
+    assert second_files == {}
+    media = json.loads(second['media'])
+    assert [(m['media'], m['caption']) for m in media] == [('file-1-0', 'first'), ('file-1-1', 'second')]
+
+
+def test_async_photo_is_uploaded_once(server: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', '100,200,300')
+    Handler.failing_chats = {'300'}
+
+    async def send() -> None:
+        tele = AsyncTelegram()
+        async with AsyncSession(base_url=server) as tele._client:
+            await tele.send_photo(b'image', 'caption')
+
+    asyncio.run(send())
+
+    first, *others = Handler.requests
+    assert first[2] == {'photo': b'image'}
+    assert sorted((fields['chat_id'], fields['photo'], files) for _, fields, files in others) == [
+        ('200', 'file-1', {}),
+        ('300', 'file-1', {}),
+    ]
+
+
+def test_failing_mirror_chat(server: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', '100,200,300')
+    Handler.failing_chats = {'200'}
+    tele = _telegram(server)
+
+    result = tele.send_message('hello')
+
+    assert result['result']['message_id'] == 1
+    assert [fields['chat_id'] for _, fields, _ in Handler.requests] == ['100', '200', '300']
+
+
+@pytest.mark.parametrize('chat_id', ['', ' , '])
+def test_chat_id_is_required(chat_id: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'token')
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', chat_id)
+    with pytest.raises(ValidationError):
+        TelegramSettings()
+
+
+def test_chat_ids_are_split(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'token')
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', '-100123, @channel')
+    assert TelegramSettings().chat_id == ['-100123', '@channel']
@@ -0,0 +1,67 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from jinja2 import TemplateNotFound
+
+import templates
+from templates import compile_templates
+
+context = {
+    'title': 'Top gainers',
+    'time': datetime(2024, 1, 2, 3, 4, 5),
+    'date': datetime(2024, 1, 2),
+    'symbols': ['BTC', 'ETH'],
+    'table': '| BTC | 1.00% |',
+    'universe': 1000,
+    'value': 42,
+    'delta': -1.5,
+    'percent': -3.45,
+    'classification': 'Fear',
+    'average': 48.123,
+    'overbought_percentage': 12.345,
+    'oversold_percentage': 6.789,
+    'conclude': 'Neutral',
+    'price': 25450,
+    'launchpools': [
+        {
+            'return_coin': 'NEW',
+            'stake_pool_list': [{'stake_coin': 'USDT', 'apr': 12.345, 'apr_vip': 20.5}],
+        }
+    ],
+}
+
+
+def test_compiled_matches_source(tmp_path: Path) -> None:
+    compile_templates(tmp_path)
+    source = templates._create_environment()
+    compiled = templates._create_environment(compiled_dir=tmp_path)
+
+    names = source.list_templates(extensions=['j2'])
+    assert names
+    for name in names:
+        assert compiled.get_template(name).render(context) == source.get_template(name).render(context)
+
+
+def test_stale_module_falls_back(tmp_path: Path) -> None:
+    compile_templates(tmp_path)
+    loader = templates._CompiledLoader(tmp_path, templates._template_dir)
+    env = templates._create_environment()
+    assert loader.load(env, 'top.j2') is not None
+
+    # An edited source no longer matches the hash recorded at compile time
+    manifest = tmp_path / 'sources.json'
+    hashes = json.loads(manifest.read_text())
+    hashes['top.j2'] = 'edited'
+    manifest.write_text(json.dumps(hashes))
+
+    loader = templates._CompiledLoader(tmp_path, templates._template_dir)
+    with pytest.raises(TemplateNotFound):
+        loader.load(env, 'top.j2')
+    compiled = templates._create_environment(compiled_dir=tmp_path)
+    assert 'Top gainers' in compiled.get_template('top.j2').render(context)
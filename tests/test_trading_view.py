@@ -0,0 +1,42 @@
+__author__ = 'Khiem Doan'
+__github__ = 'https://github.com/khiemdoan'
+__email__ = 'doankhiem.crazy@gmail.com'
+
+import numpy as np
+import pytest
+
+from trading_view import Tops, _parse_tops, _rows, _top_indices
+
+
+def test_top_indices_matches_full_sort() -> None:
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=1000)
+    values[rng.choice(1000, 50, replace=False)] = np.nan
+
+    valid = np.flatnonzero(~np.isnan(values))
+    expected_desc = valid[np.argsort(-values[valid])][:20]
+    expected_asc = valid[np.argsort(values[valid])][:20]
+
+    assert np.array_equal(_top_indices(values, 20, True), expected_desc)
+    assert np.array_equal(_top_indices(values, 20, False), expected_asc)
+
+
+def test_top_indices_short_input() -> None:
+    values = np.array([1.0, np.nan, 3.0])
+    assert _top_indices(values, 20, True).tolist() == [2, 0]
+    assert _top_indices(np.array([]), 20, True).tolist() == []
+
+
+def test_parse_tops() -> None:
+    rows = [['BTC', 1.5, 900, 3e10], ['ETH', -2.0, None, 1e10], ['DOGE', 8.0, 500, 5e8]]
+    tops = _parse_tops(rows, 2)
+
+    assert [t.symbol for t in tops.gainers] == ['DOGE', 'BTC']
+    assert [t.symbol for t in tops.lossers] == ['ETH', 'BTC']
+    assert [(t.symbol, t.transaction) for t in tops.transactions] == [('BTC', 900), ('DOGE', 500)]
+    assert [t.symbol for t in tops.volumes] == ['BTC', 'ETH']
+
+
+@pytest.mark.parametrize('data', [{'totalCount': 0, 'data': []}, {'totalCount': 0, 'data': None}])
+def test_empty_scan(data: dict) -> None:
+    assert _parse_tops(_rows(data), 20) == Tops([], [], [], [])